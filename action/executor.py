@@ -5,6 +5,9 @@ import textwrap
 import time
 from datetime import datetime
 
+from agent.metrics import EXECUTOR_RUNS, EXECUTOR_SECONDS
+from agent.tracing import span
+
 # ───────────────────────────────────────────────────────────────
 # CONFIG
 # ───────────────────────────────────────────────────────────────
@@ -74,7 +77,7 @@ def build_safe_globals(mcp_funcs: dict, multi_mcp=None) -> dict:
     if multi_mcp:
         async def parallel(*tool_calls):
             coros = [
-                multi_mcp.function_wrapper(tool_name, *args)
+                call_tool_traced(multi_mcp, tool_name, *args)
                 for tool_name, *args in tool_calls
             ]
             return await asyncio.gather(*coros)
@@ -89,14 +92,33 @@ def build_safe_globals(mcp_funcs: dict, multi_mcp=None) -> dict:
 # ───────────────────────────────────────────────────────────────
 def make_tool_proxy(tool_name: str, mcp):
     async def _tool_fn(*args):
-        return await mcp.function_wrapper(tool_name, *args)
+        return await call_tool_traced(mcp, tool_name, *args)
 
     return _tool_fn
 
+
+async def call_tool_traced(mcp, tool_name: str, *args):
+    with span(f"tool:{tool_name}", args_chars=len(repr(args))) as tool_span:
+        result = await mcp.function_wrapper(tool_name, *args)
+        tool_span.set(result_chars=len(str(result)))
+        if getattr(result, "isError", False):
+            tool_span.set(outcome="error")
+        return result
+
 # ───────────────────────────────────────────────────────────────
 # MAIN EXECUTOR
 # ───────────────────────────────────────────────────────────────
-async def run_user_code(code: str, multi_mcp) -> dict:
+async def run_user_code(code: str, multi_mcp, context: dict | None = None) -> dict:
+    """Run a CODE step in the sandbox. `context` adds read-only globals, e.g. earlier `step_results`."""
+    with span("executor", code_chars=len(code)) as executor_span, EXECUTOR_SECONDS.time():
+        response = await _execute_user_code(code, multi_mcp, context)
+        EXECUTOR_RUNS.inc(status=response["status"])
+        executor_span.set(outcome="ok" if response["status"] == "success" else "error",
+                          result_chars=len(response.get("result", response.get("error")) or ""))
+        return response
+
+
+async def _execute_user_code(code: str, multi_mcp, context: dict | None) -> dict:
     start_time = time.perf_counter()
     start_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -116,6 +138,7 @@ async def run_user_code(code: str, multi_mcp) -> dict:
         }
 
         sandbox = build_safe_globals(tool_funcs, multi_mcp)
+        sandbox.update(context or {})
         local_vars = {}
 
         cleaned_code = textwrap.dedent(code.strip())
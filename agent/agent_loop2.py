@@ -1,53 +1,282 @@
+from __future__ import annotations
+
+import asyncio
 import json
+import time
 import uuid
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Optional
 
 from action.executor import run_user_code
 from agent.agent_session import AgentSession, PerceptionSnapshot, Step, ToolCode
+from agent.events import emit
+from agent.metrics import REPLANS, SESSION_SECONDS, SESSIONS, SESSIONS_IN_FLIGHT, SPECULATIONS, STEPS_PER_SESSION
+from agent.profiling import profile_thread_call
+from agent.tracing import span
 from decision.decision import Decision
-from mcp_servers.multiMCP import MultiMCP
+from llm.resilience import retry_budget_scope
+from memory.answer_cache import AnswerCache
 from memory.memory_search import MemorySearch
-from memory.session_log import live_update_session
+from memory.plan_cache import PlanCache
+from memory.session_log import compact_session, live_update_session, load_session
 from perception.perception import Perception
 
+if TYPE_CHECKING:
+    from mcp_servers.multiMCP import MultiMCP
+
 GLOBAL_PREVIOUS_FAILURE_STEPS = 3
 
 
+@dataclass
+class SpeculationStats:
+    launched: int = 0
+    used: int = 0
+    wasted_step_failed: int = 0
+    wasted_goal_achieved: int = 0
+    saved_seconds: float = 0.0
+
+    @property
+    def wasted(self) -> int:
+        return self.wasted_step_failed + self.wasted_goal_achieved
+
+    def summary(self) -> str:
+        waste_rate = self.wasted / self.launched if self.launched else 0.0
+        return (f"used {self.used}/{self.launched}, wasted {self.wasted} ({waste_rate:.0%}: "
+                f"{self.wasted_step_failed} failed step, {self.wasted_goal_achieved} goal achieved), "
+                f"~{self.saved_seconds:.1f}s saved")
+
+
 class AgentLoop:
     def __init__(self, perception_prompt_path: str, decision_prompt_path: str, multi_mcp: MultiMCP,
-                 strategy: str = "exploratory"):
-        self.perception = Perception(perception_prompt_path)
-        self.decision = Decision(decision_prompt_path, multi_mcp)
+                 strategy: str = "exploratory", hedge_llm: bool = False, speculative: bool = False,
+                 plan_cache: Optional[PlanCache] = None, answer_cache: Optional[AnswerCache] = None,
+                 multi_step: bool = False, memory_search: Optional[MemorySearch] = None):
+        self.perception = Perception(perception_prompt_path, hedge=hedge_llm)
+        self.decision = Decision(decision_prompt_path, multi_mcp, hedge=hedge_llm)
         self.multi_mcp = multi_mcp
         self.strategy = strategy
+        self.speculative = speculative
+        self._speculations: dict[str, asyncio.Task] = {}  # session_id → in-flight next-step decision
+        self._speculation_stats: dict[str, SpeculationStats] = {}  # session_id → that session's speculation
+        self.plan_cache = plan_cache
+        self.answer_cache = answer_cache
+        self.multi_step = multi_step  # let the decision return several CODE steps to run without LLM calls between them
+        self.memory_search = memory_search or MemorySearch()  # shared, so its file index stays warm across queries
 
     async def run(self, query: str):
+        return await self._observe(self._run(query), query=query)
+
+    async def resume(self, session_id: str, base_dir: str = "memory/session_logs"):
+        """
+        Continue a session from its last checkpoint in the session store (e.g. after a crash or deploy).
+        Completed steps are not re-run: the loop picks up at pending steps or at the last step's evaluation.
+        """
+        session = load_session(session_id, base_dir)
+        return await self._observe(self._resume(session), query=session.original_query, resumed=True)
+
+    async def _observe(self, session_run, **span_attrs):
+        with retry_budget_scope(), span("session", strategy=self.strategy, **span_attrs) as session_span, \
+                SESSIONS_IN_FLIGHT.track_in_progress(), SESSION_SECONDS.time():
+            try:
+                session = await session_run
+            except Exception:
+                SESSIONS.inc(outcome="error")
+                raise
+            counts = session.step_counts()
+            SESSIONS.inc(outcome=self.session_outcome(session))
+            STEPS_PER_SESSION.observe(counts["steps"])
+            session_span.set(session_id=session.session_id,
+                             original_goal_achieved=session.state["original_goal_achieved"],
+                             cached=bool(session.state.get("cached") or session.state.get("plan_cache_hit")),
+                             **counts)
+            return session
+
+    @staticmethod
+    def session_outcome(session) -> str:
+        if session.state.get("cached"):
+            return "answer_cache"
+        if session.state.get("plan_cache_hit"):
+            return "plan_cache"
+        return "achieved" if session.state["original_goal_achieved"] else "unresolved"
+
+    async def _run(self, query: str):
         session = AgentSession(session_id=str(uuid.uuid4()), original_query=query)
-        session_memory = []
         self.log_session_start(session, query)
+        return await self.start_session(session)
 
-        memory_results = self.search_memory(query)
-        perception_result = self.run_perception(query, memory_results, memory_results)
+    async def start_session(self, session):
+        query = session.original_query
+        if self.answer_cache and self.answer_from_cache(session, query):
+            self.log_session_end(session)
+            return session
+
+        if self.plan_cache and await self.run_cached_plan(session, query):
+            self.finish_session(session)
+            return session
+
+        # LLM calls and memory search block; keep them off the event loop so sessions run concurrently
+        memory_results = await self.in_thread(session, "memory_search", self.search_memory, query)
+        perception_result = await self.in_thread(session, "perception", self.run_perception, query, memory_results,
+                                                 memory_results)
         session.add_perception(PerceptionSnapshot(**perception_result))
 
         if perception_result.get("original_goal_achieved"):
             self.handle_perception_completion(session, perception_result)
+            self.finish_session(session)
             return session
+        return await self.plan_session(session, perception_result)
 
-        decision_output = self.make_initial_decision(query, perception_result)
-        step = session.add_plan_version(decision_output["plan_text"], [self.create_step(decision_output)])
+    async def plan_session(self, session, perception_result):
+        decision_output = await self.in_thread(session, "decision", self.make_initial_decision,
+                                               session.original_query, perception_result)
+        steps = self.create_steps(decision_output)
+        session.add_plan_version(decision_output["plan_text"], steps)
         live_update_session(session)
-        print(f"\n[Decision Plan Text: V{len(session.plan_versions)}]:")
-        for line in session.plan_versions[-1]["plan_text"]:
-            print(f"  {line}")
+        self.print_plan(session)
+        return await self.run_steps(session, steps, [])
 
-        while step:
-            step_result = await self.execute_step(step, session, session_memory)
-            if step_result is None:
-                break  # 🔐 protect against CONCLUDE/NOP cases
-            step = self.evaluate_step(step_result, session, query)
+    async def run_steps(self, session, steps, session_memory):
+        try:
+            while steps:
+                step_result = await self.execute_steps(steps, session, session_memory)
+                if step_result is None:
+                    break  # 🔐 protect against CONCLUDE/NOP cases
+                steps = await self.evaluate_step(step_result, session, session.original_query)
+        finally:
+            # a step that raised may leave this session's speculative decision behind
+            self.discard_speculation(session, self._speculations.pop(session.session_id, None), "step_failed")
+            stats = self._speculation_stats.pop(session.session_id, None)
 
+        if stats is not None:
+            print(f"\n⚡ Speculation: {stats.summary()}")
+        self.finish_session(session)
         return session
 
+    async def _resume(self, session):
+        print(f"\n♻️ Resuming session {session.session_id}: {session.original_query}")
+        emit("session_resumed", session_id=session.session_id, query=session.original_query,
+             **session.step_counts())
+
+        if session.state["original_goal_achieved"]:
+            print("✅ Session already finished; nothing to resume.")
+            self.log_session_end(session)
+            return session
+        if session.perception is None:
+            return await self.start_session(session)
+        if not session.plan_versions:
+            perception_result = asdict(session.perception)
+            if session.perception.original_goal_achieved:
+                self.handle_perception_completion(session, perception_result)
+                self.finish_session(session)
+                return session
+            return await self.plan_session(session, perception_result)
+
+        session_memory = self.rebuild_session_memory(session)
+        steps = session.plan_versions[-1]["steps"]
+        pending = [s for s in steps if s.status == "pending"]
+        if pending:
+            print(f"▶️ Continuing with {len(pending)} pending step(s).")
+            return await self.run_steps(session, pending, session_memory)
+
+        last = next((s for s in reversed(steps) if s.status == "completed"), None)
+        if last is None or last.type != "CODE":
+            self.finish_session(session)  # ended on CONCLUDE/NOP: nothing left to do
+            return session
+        if last.perception is None:
+            print(f"🔎 Step {last.index} ran before the interruption; re-running only its perception.")
+            await self.perceive_code_step(last, session, session_memory)
+        return await self.run_steps(session, await self.evaluate_step(last, session, session.original_query),
+                                    session_memory)
+
+    def rebuild_session_memory(self, session):
+        """Recreate the in-flight failure memory from the failed steps stored in the session."""
+        failures = [
+            {
+                "query": step.description,
+                "result_requirement": "Tool failed",
+                "solution_summary": str(step.execution_result)[:300]
+            }
+            for version in session.plan_versions for step in version["steps"]
+            if step.type == "CODE" and step.perception and not step.perception.local_goal_achieved
+        ]
+        return failures[-GLOBAL_PREVIOUS_FAILURE_STEPS:]
+
+    def finish_session(self, session):
+        """Feed the caches from a finished session, then announce the end."""
+        if self.plan_cache:
+            self.plan_cache.record(session)
+        if self.answer_cache:
+            self.answer_cache.record(session)
+        self.log_session_end(session)
+
+    def answer_from_cache(self, session, query) -> bool:
+        cached = self.answer_cache.lookup(query)
+        if cached is None:
+            return False
+
+        age = time.time() - cached["created_at"]
+        print(f"\n⚡ Answer cache hit (answered {age / 60:.1f} min ago in session {cached['session_id']}).")
+        session.state.update(cached["state"])
+        session.state.update({
+            "cached": True,
+            "cache": {
+                "source_session": cached["session_id"],
+                "cached_at": cached["created_at"],
+                "expires_at": cached["expires_at"],
+                "tools": cached["tools"]
+            }
+        })
+        emit("answer_cache_hit", source_session=cached["session_id"], age_seconds=round(age, 1))
+        live_update_session(session)
+        return True
+
+    async def run_cached_plan(self, session, query) -> bool:
+        """Answer from a cached CODE template, skipping the decision; perception still checks the result. False on miss/failure."""
+        cached = self.plan_cache.match(query)
+        if cached is None:
+            return False
+        template, code = cached
+
+        print(f"\n🧩 Plan cache hit: {template['description']}")
+        step = session.add_plan_version(
+            [f"Step 0: {template['description']} (cached plan from session {template['source_session']})"],
+            [Step(index=0, description=template["description"], type="CODE",
+                  code=ToolCode(tool_name="raw_code_block", tool_arguments={"code": code}))]
+        )
+        emit("plan_cache_hit", template=template["query_template"], code=code)
+
+        start = time.perf_counter()
+        executor_response = await run_user_code(code, self.multi_mcp)
+        session.record_timing("execution", time.perf_counter() - start)
+        step.execution_result = executor_response
+
+        if executor_response.get("status") != "success":
+            self.plan_cache.report(template, False)
+            print(f"🧩 Cached plan failed ({executor_response.get('error')}); falling back to the LLM.")
+            step.status = "failed"
+            step.error = executor_response.get("error")
+            return False
+
+        result = executor_response["result"]
+        summary = template["summary_template"].replace("{result}", result) if template["summary_template"] else result
+        step.status = "completed"
+        # the template only matched the query's shape: perception decides whether the result answers it
+        perception_result = await self.in_thread(session, "perception", self.run_perception, query=summary,
+                                                 memory_results=[],
+                                                 current_plan=session.plan_versions[-1]["plan_text"],
+                                                 snapshot_type="step_result")
+        step.perception = PerceptionSnapshot(**perception_result)
+        self.plan_cache.report(template, step.perception.original_goal_achieved)
+        if not step.perception.original_goal_achieved:
+            print("🧩 Cached plan didn't answer the query; falling back to the LLM.")
+            live_update_session(session)
+            return False
+
+        session.mark_complete(step.perception, final_answer=result, fallback_confidence=0.9)
+        session.state["plan_cache_hit"] = True
+        live_update_session(session)
+        return True
+
     def create_step(self, decision_output):
         return Step(
             index=decision_output["step_index"],
@@ -55,47 +284,37 @@ class AgentLoop:
             type=decision_output["type"],
             code=ToolCode(tool_name="raw_code_block", tool_arguments={"code": decision_output["code"]}) if
             decision_output["type"] == "CODE" else None,
-            conclusion=decision_output.get("conclusion")
+            conclusion=decision_output.get("conclusion"),
+            depends_on=decision_output.get("depends_on")
         )
 
+    def create_steps(self, decision_output) -> list[Step]:
+        """One step normally; the whole CODE batch when multi-step mode is on and the model returned one."""
+        batch = decision_output.get("steps") or []
+        if self.multi_step and len(batch) > 1 and all(s["type"] == "CODE" for s in batch):
+            return [self.create_step(s) for s in batch]
+        return [self.create_step(decision_output)]
+
+    async def execute_steps(self, steps, session, session_memory):
+        if len(steps) == 1 and not steps[0].depends_on:
+            return await self.execute_step(steps[0], session, session_memory)
+        return await self.execute_step_batch(steps, session, session_memory)
+
     async def execute_step(self, step, session, session_memory):
         print(f"\n[Step {step.index}] {step.description}")
+        emit("step_started", index=step.index, type=step.type, description=step.description)
 
         if step.type == "CODE":
-            print("-" * 50, "\n[EXECUTING CODE]\n", step.code.tool_arguments["code"])
-            executor_response = await run_user_code(step.code.tool_arguments["code"], self.multi_mcp)
-            step.execution_result = executor_response
-            step.status = "completed"
-
-            perception_result = self.run_perception(
-                query=executor_response.get('result', 'Tool Failed'),
-                memory_results=session_memory,
-                current_plan=session.plan_versions[-1]["plan_text"],
-                snapshot_type="step_result"
-            )
-
-            step.perception = PerceptionSnapshot(**perception_result)
-
-            if not step.perception or not step.perception.local_goal_achieved:
-                failure_memory = {
-                    "query": step.description,
-                    "result_requirement": "Tool failed",
-                    "solution_summary": str(step.execution_result)[:300]
-                }
-                session_memory.append(failure_memory)
-
-                if len(session_memory) > GLOBAL_PREVIOUS_FAILURE_STEPS:
-                    session_memory.pop(0)
-
-                live_update_session(session)
-                return step
+            await self.run_code_step(step, session)
+            return await self.perceive_code_step(step, session, session_memory)
 
         elif step.type == "CONCLUDE":
             print(f"\n💡 Conclusion: {step.conclusion}")
             step.execution_result = step.conclusion
             step.status = "completed"
 
-            perception_result = self.run_perception(
+            perception_result = await self.in_thread(
+                session, "perception", self.run_perception,
                 query=step.conclusion,
                 memory_results=session_memory,
                 current_plan=session.plan_versions[-1]["plan_text"],
@@ -112,42 +331,224 @@ class AgentLoop:
             live_update_session(session)
             return None
 
-    def evaluate_step(self, step, session, query):
+    async def run_code_step(self, step, session, context=None):
+        print("-" * 50, "\n[EXECUTING CODE]\n", step.code.tool_arguments["code"])
+        start = time.perf_counter()
+        executor_response = await run_user_code(step.code.tool_arguments["code"], self.multi_mcp, context=context)
+        session.record_timing("execution", time.perf_counter() - start)
+        step.execution_result = executor_response
+        step.status = "completed"
+        live_update_session(session)  # checkpoint: a resume must not re-run this tool work
+        emit("step_executed", index=step.index, status=executor_response.get("status"),
+             result=str(executor_response.get("result", executor_response.get("error")))[:500])
+
+    async def perceive_code_step(self, step, session, session_memory, result_text=None):
+        perception_kwargs = dict(
+            query=result_text or step.execution_result.get('result', 'Tool Failed'),
+            memory_results=session_memory,
+            current_plan=session.plan_versions[-1]["plan_text"],
+            snapshot_type="step_result"
+        )
+        if self.speculative:
+            perception_result = await self.run_perception_with_speculation(step, session, perception_kwargs)
+        else:
+            perception_result = await self.in_thread(session, "perception", self.run_perception, **perception_kwargs)
+
+        step.perception = PerceptionSnapshot(**perception_result)
+
+        if not step.perception or not step.perception.local_goal_achieved:
+            failure_memory = {
+                "query": step.description,
+                "result_requirement": "Tool failed",
+                "solution_summary": str(step.execution_result)[:300]
+            }
+            session_memory.append(failure_memory)
+
+            if len(session_memory) > GLOBAL_PREVIOUS_FAILURE_STEPS:
+                session_memory.pop(0)
+
+        live_update_session(session)
+        return step
+
+    async def execute_step_batch(self, steps, session, session_memory):
+        """
+        Run a multi-step CODE plan back-to-back without LLM calls in between. Steps whose
+        dependencies are met run concurrently; a dependent step reads earlier results from
+        `step_results[<step_index>]`. Perception runs once, on the combined results of the executed
+        steps, and is attached to the last step or the first failure.
+        """
+        print(f"\n[Batch] Executing {len(steps)} planned steps without intermediate LLM calls")
+        batch_indexes = {s.index for s in steps}
+        # Results of steps that already ran in this plan version (e.g. before a resume) are available too
+        results: dict[int, str] = {
+            s.index: s.execution_result["result"] for s in session.plan_versions[-1]["steps"]
+            if s.status == "completed" and isinstance(s.execution_result, dict)
+            and s.execution_result.get("status") == "success"
+        }
+        remaining = list(steps)
+        executed, failed = [], None
+
+        while remaining and failed is None:
+            ready = [
+                s for s in remaining
+                if all(d in results or d not in batch_indexes for d in (s.depends_on or []))
+            ]
+            if not ready:
+                print("⚠️ Batch has unsatisfiable dependencies; stopping early.")
+                break
+
+            for s in ready:
+                print(f"\n[Step {s.index}] {s.description}")
+                emit("step_started", index=s.index, type=s.type, description=s.description)
+            context = {"step_results": dict(results)}
+            await asyncio.gather(*(self.run_code_step(s, session, context=context) for s in ready))
+
+            for s in ready:
+                remaining.remove(s)
+                executed.append(s)
+                if s.execution_result.get("status") == "success":
+                    results[s.index] = s.execution_result["result"]
+                elif failed is None:
+                    failed = s
+
+        for s in remaining:
+            s.status = "skipped"
+        live_update_session(session)
+
+        if not executed:
+            return None
+        # perception (and so the summary and final answer) must see every step's output, not just the last one
+        combined = "\n".join(
+            f"[Step {s.index}] {s.description}: "
+            f"{s.execution_result.get('result', s.execution_result.get('error', 'Tool Failed'))}"
+            for s in executed
+        ) if len(executed) > 1 else None
+        return await self.perceive_code_step(failed or executed[-1], session, session_memory, combined)
+
+    async def evaluate_step(self, step, session, query) -> Optional[list[Step]]:
+        speculation = self._speculations.pop(session.session_id, None)
+
         if step.perception.original_goal_achieved:
+            self.discard_speculation(session, speculation, "goal_achieved")
             print("\n✅ Goal achieved.")
             session.mark_complete(step.perception)
             live_update_session(session)
             return None
         elif step.perception.local_goal_achieved:
-            return self.get_next_step(session, query, step)
+            return await self.get_next_step(session, query, step, speculation)
         else:
+            self.discard_speculation(session, speculation, "step_failed")
             print("\n🔁 Step unhelpful. Replanning.")
-            decision_output = self.decision.run({
-                "plan_mode": "mid_session",
-                "planning_strategy": self.strategy,
-                "original_query": query,
-                "current_plan_version": len(session.plan_versions),
-                "current_plan": session.plan_versions[-1]["plan_text"],
-                "completed_steps": [s.to_dict() for s in session.plan_versions[-1]["steps"] if s.status == "completed"],
-                "current_step": step.to_dict()
-            })
-            step = session.add_plan_version(decision_output["plan_text"], [self.create_step(decision_output)])
-
-            print(f"\n[Decision Plan Text: V{len(session.plan_versions)}]:")
-            for line in session.plan_versions[-1]["plan_text"]:
-                print(f"  {line}")
-
-            return step
+            REPLANS.inc()
+            decision_output = await self.in_thread(session, "decision", self.decision.run,
+                                                   self.build_mid_session_input(session, query, step))
+            steps = self.create_steps(decision_output)
+            session.add_plan_version(decision_output["plan_text"], steps)
+            self.print_plan(session)
+            return steps
+
+    async def get_next_step(self, session, query, step, speculation=None):
+        if speculation is not None:
+            wait_start = time.perf_counter()
+            decision_output, decision_seconds = await speculation
+            waited = time.perf_counter() - wait_start
+            session.record_timing("decision", waited)
+            stats = self._speculation_stats[session.session_id]
+            stats.used += 1
+            SPECULATIONS.inc(result="used")
+            stats.saved_seconds += max(0.0, decision_seconds - waited)
+            print(f"⚡ Using speculative decision (waited {waited:.2f}s of {decision_seconds:.2f}s).")
+        else:
+            decision_output = await self.in_thread(session, "decision", self.decision.run,
+                                                   self.build_mid_session_input(session, query, step))
+
+        next_steps = self.create_steps(decision_output)
+        if decision_output["plan_text"] != session.plan_versions[-1]["plan_text"]:
+            session.add_plan_version(decision_output["plan_text"], next_steps)
+            self.print_plan(session)
+        else:
+            session.plan_versions[-1]["steps"].extend(next_steps)
+        return next_steps
+
+    def build_mid_session_input(self, session, query, step):
+        return {
+            "plan_mode": "mid_session",
+            "planning_strategy": self.strategy,
+            "original_query": query,
+            "current_plan_version": len(session.plan_versions),
+            "current_plan": session.plan_versions[-1]["plan_text"],
+            "completed_steps": [s.to_dict() for s in session.plan_versions[-1]["steps"] if s.status == "completed"],
+            "current_step": step.to_dict(),
+            **({"multi_step": True} if self.multi_step else {})
+        }
+
+    async def run_perception_with_speculation(self, step, session, perception_kwargs):
+        """
+        Start the next-step decision alongside perception, assuming the step succeeded.
+        `evaluate_step` keeps it only if perception confirms local success without finishing the goal.
+        """
+        # Snapshot the input now: perception hasn't been attached to the step yet
+        decision_input = self.build_mid_session_input(session, session.original_query, step)
+
+        def timed_decision():
+            start = time.perf_counter()
+            with span("decision", speculative=True):
+                output = self.decision.run(decision_input)
+            return output, time.perf_counter() - start
+
+        self._speculations[session.session_id] = asyncio.create_task(
+            asyncio.to_thread(profile_thread_call("decision", timed_decision)))
+        self._speculation_stats.setdefault(session.session_id, SpeculationStats()).launched += 1
+        try:
+            return await self.in_thread(session, "perception", self.run_perception, **perception_kwargs)
+        except BaseException:
+            self.discard_speculation(session, self._speculations.pop(session.session_id, None), "step_failed")
+            raise
+
+    async def in_thread(self, session, stage, fn, *args, **kwargs):
+        """Run a blocking LLM/memory call in a worker thread and charge its wall time to `stage`."""
+        start = time.perf_counter()
+        try:
+            with span(stage):
+                return await asyncio.to_thread(profile_thread_call(stage, fn), *args, **kwargs)
+        finally:
+            session.record_timing(stage, time.perf_counter() - start)
+
+    def discard_speculation(self, session, speculation, reason):
+        if speculation is None:
+            return
+        # The thread can't be interrupted; drop its result (and any error) when it lands
+        speculation.add_done_callback(lambda t: t.cancelled() or t.exception())
+        SPECULATIONS.inc(result=f"wasted_{reason}")
+        stats = self._speculation_stats.get(session.session_id)
+        if stats is not None:
+            if reason == "goal_achieved":
+                stats.wasted_goal_achieved += 1
+            else:
+                stats.wasted_step_failed += 1
+        print(f"🗑️ Discarding speculative decision ({reason}).")
+
+    def print_plan(self, session):
+        print(f"\n[Decision Plan Text: V{len(session.plan_versions)}]:")
+        for line in session.plan_versions[-1]["plan_text"]:
+            print(f"  {line}")
+        emit("plan", version=len(session.plan_versions), plan_text=session.plan_versions[-1]["plan_text"])
 
     def log_session_start(self, session, query):
         print("\n=== LIVE AGENT SESSION TRACE ===")
         print(f"Session ID: {session.session_id}")
         print(f"Query: {query}")
+        emit("session_started", session_id=session.session_id, query=query)
+
+    def log_session_end(self, session):
+        compact_session(session)
+        emit("session_completed", session_id=session.session_id,
+             original_goal_achieved=session.state["original_goal_achieved"],
+             solution_summary=session.state["solution_summary"])
 
     def search_memory(self, query):
         print("Searching Recent Conversation History")
-        searcher = MemorySearch()
-        results = searcher.search_memory(query)
+        results = self.memory_search.search_memory(query)
         if not results:
             print("❌ No matching memory entries found.\n")
         else:
@@ -168,6 +569,10 @@ class AgentLoop:
         perception_result = self.perception.run(perception_input)
         print("\n[Perception Result]:")
         print(json.dumps(perception_result, indent=2, ensure_ascii=False))
+        emit("perception", snapshot_type=snapshot_type,
+             original_goal_achieved=perception_result.get("original_goal_achieved"),
+             local_goal_achieved=perception_result.get("local_goal_achieved"),
+             solution_summary=perception_result.get("solution_summary"))
         return perception_result
 
     def handle_perception_completion(self, session, perception_result):
@@ -186,7 +591,8 @@ class AgentLoop:
             "plan_mode": "initial",
             "planning_strategy": self.strategy,
             "original_query": query,
-            "perception": perception_result
+            "perception": perception_result,
+            **({"multi_step": True} if self.multi_step else {})
         }
         decision_output = self.decision.run(decision_input)
         return decision_output
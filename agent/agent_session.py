@@ -1,10 +1,12 @@
 import json
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 from typing import Optional, Any, Literal
 
+from agent.metrics import STAGE_SECONDS
 
-@dataclass
+
+@dataclass(slots=True)
 class ToolCode:
     tool_name: str
     tool_arguments: dict[str, Any]
@@ -15,8 +17,12 @@ class ToolCode:
             "tool_arguments": self.tool_arguments
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "ToolCode":
+        return cls(tool_name=data["tool_name"], tool_arguments=data.get("tool_arguments", {}))
+
 
-@dataclass
+@dataclass(slots=True)
 class PerceptionSnapshot:
     entities: list[str]
     result_requirement: str
@@ -28,8 +34,26 @@ class PerceptionSnapshot:
     solution_summary: str
     confidence: str
 
+    def to_dict(self):
+        return {
+            "entities": self.entities,
+            "result_requirement": self.result_requirement,
+            "original_goal_achieved": self.original_goal_achieved,
+            "reasoning": self.reasoning,
+            "local_goal_achieved": self.local_goal_achieved,
+            "local_reasoning": self.local_reasoning,
+            "last_tooluse_summary": self.last_tooluse_summary,
+            "solution_summary": self.solution_summary,
+            "confidence": self.confidence
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PerceptionSnapshot":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
 
-@dataclass
+@dataclass(slots=True)
 class Step:
     index: int
     description: str
@@ -43,6 +67,7 @@ class Step:
     attempts: int = 0
     was_replanned: bool = False
     parent_index: Optional[int] = None
+    depends_on: Optional[list[int]] = None
 
     def to_dict(self):
         return {
@@ -53,18 +78,30 @@ class Step:
             "conclusion": self.conclusion,
             "execution_result": self.execution_result,
             "error": self.error,
-            "perception": self.perception.__dict__ if self.perception else None,
+            "perception": self.perception.to_dict() if self.perception else None,
             "status": self.status,
             "attempts": self.attempts,
             "was_replanned": self.was_replanned,
-            "parent_index": self.parent_index
+            "parent_index": self.parent_index,
+            "depends_on": self.depends_on
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "Step":
+        known = {f.name for f in fields(cls)}
+        step = cls(**{k: v for k, v in data.items() if k in known})
+        if isinstance(step.code, dict):
+            step.code = ToolCode.from_dict(step.code)
+        if isinstance(step.perception, dict):
+            step.perception = PerceptionSnapshot.from_dict(step.perception)
+        return step
+
 
 class AgentSession:
     def __init__(self, session_id: str, original_query: str):
         self.session_id = session_id
         self.original_query = original_query
+        self.created_at = time.time()
         self.perception: Optional[PerceptionSnapshot] = None
         self.plan_versions: list[dict[str, Any]] = []
         self.state = {
@@ -74,6 +111,20 @@ class AgentSession:
             "reasoning_note": "",
             "solution_summary": ""
         }
+        self.timings: dict[str, float] = {}  # stage → cumulative wall seconds
+
+    def record_timing(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+    def step_counts(self) -> dict[str, int]:
+        steps = [s for version in self.plan_versions for s in version["steps"]]
+        return {
+            "plan_versions": len(self.plan_versions),
+            "steps": len(steps),
+            "completed_steps": sum(1 for s in steps if s.status == "completed"),
+            "code_steps": sum(1 for s in steps if s.type == "CODE")
+        }
 
     def add_perception(self, snapshot: PerceptionSnapshot):
         self.perception = snapshot
@@ -90,35 +141,64 @@ class AgentSession:
         return sum(len(ver["steps"]) for ver in self.plan_versions)
 
     def get_snapshot_summary(self):
+        return self._snapshot_summary([
+            s.to_dict()
+            for version in self.plan_versions
+            for s in version["steps"]
+            if s.status == "completed"
+        ])
+
+    def _snapshot_summary(self, final_steps: list[dict]):
         return {
             "session_id": self.session_id,
             "query": self.original_query,
             "final_plan": self.plan_versions[-1]["plan_text"] if self.plan_versions else [],
-            "final_steps": [
-                asdict(s)
-                for version in self.plan_versions
-                for s in version["steps"]
-                if s.status == "completed"
-            ],
+            "final_steps": final_steps,
             "final_answer": self.state["final_answer"],
             "confidence": self.state["confidence"],
             "reasoning_note": self.state["reasoning_note"]
         }
 
     def to_json(self):
+        """
+        JSON-ready dict in one pass: each step is converted once and shared with the snapshot
+        summary. Values are not deep-copied, so serialize it before the session changes again.
+        """
+        versions, final_steps = [], []
+        for p in self.plan_versions:
+            steps = [s.to_dict() for s in p["steps"]]
+            final_steps.extend(d for s, d in zip(p["steps"], steps) if s.status == "completed")
+            versions.append({"plan_text": p["plan_text"], "steps": steps})
         return {
             "session_id": self.session_id,
             "original_query": self.original_query,
-            "perception": asdict(self.perception) if self.perception else None,
-            "plan_versions": [
-                {
-                    "plan_text": p["plan_text"],
-                    "steps": [asdict(s) for s in p["steps"]]
-                } for p in self.plan_versions
-            ],
-            "state_snapshot": self.get_snapshot_summary()
+            "created_at": self.created_at,
+            "perception": self.perception.to_dict() if self.perception else None,
+            "plan_versions": versions,
+            "state_snapshot": self._snapshot_summary(final_steps),
+            "state": self.state,
+            "timings": self.timings
         }
 
+    @classmethod
+    def from_json(cls, data: dict) -> "AgentSession":
+        """Rebuild a session from a `to_json` snapshot (as written by the session store)."""
+        session = cls(session_id=data["session_id"], original_query=data["original_query"])
+        session.created_at = data.get("created_at", session.created_at)
+        if data.get("perception"):
+            session.perception = PerceptionSnapshot.from_dict(data["perception"])
+        session.plan_versions = [
+            {"plan_text": version["plan_text"], "steps": [Step.from_dict(s) for s in version["steps"]]}
+            for version in data.get("plan_versions", [])
+        ]
+        if "state" in data:
+            session.state.update(data["state"])
+        else:  # snapshots written before the full state was stored
+            snapshot = data.get("state_snapshot", {})
+            session.state.update({k: snapshot[k] for k in ("final_answer", "confidence", "reasoning_note") if k in snapshot})
+        session.timings = dict(data.get("timings", {}))
+        return session
+
     def mark_complete(self, perception: PerceptionSnapshot, final_answer: Optional[str] = None,
                       fallback_confidence: float = 0.95):
         self.state.update({
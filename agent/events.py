@@ -0,0 +1,31 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+EventSink = Callable[[dict], None]
+
+_sink: ContextVar[Optional[EventSink]] = ContextVar("agent_event_sink", default=None)
+
+
+@contextmanager
+def event_sink(callback: EventSink):
+    """
+    Route progress events emitted inside this block (one agent session) to `callback`.
+    The callback may be invoked from worker threads, so it must be thread-safe.
+    """
+    token = _sink.set(callback)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def emit(event: str, **data) -> None:
+    sink = _sink.get()
+    if sink is None:
+        return
+    try:
+        sink({"event": event, "ts": round(time.time(), 3), **data})
+    except Exception as e:
+        print(f"⚠️ Event sink failed on '{event}': {e}")
@@ -0,0 +1,259 @@
+"""
+Process-wide metrics in the Prometheus text exposition format (stdlib only).
+
+    start_metrics_server(9464)         # GET http://127.0.0.1:9464/metrics
+    start_metrics_dump("metrics.prom")  # rewrite the file every few seconds (node_exporter textfile style)
+
+The metric catalog lives at the bottom of this module so names stay consistent across
+AgentLoop, Perception, Decision, the executor, MultiMCP and the session logger.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DUMP_INTERVAL = 15.0  # seconds
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labels)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: tuple, value) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_in_progress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            buckets, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    buckets[i] += 1
+            self._values[key] = (buckets, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key: tuple, value) -> list[str]:
+        buckets, total, count = value
+        lines = []
+        for bound, bucket_count in [*zip(self.buckets, buckets), ("+Inf", count)]:
+            le = 'le="%s"' % bound
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {bucket_count}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ─── Exposition ─────────────────────────────────────────────
+def start_metrics_server(port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread, independent of the asyncio loop."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # scrapes every few seconds would flood stdout
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return server
+
+
+def dump_metrics(path: str, registry: MetricsRegistry = REGISTRY):
+    """Atomically rewrite `path` with the current metrics."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix(target.suffix + ".tmp")
+    tmp_path.write_text(registry.render(), encoding="utf-8")
+    tmp_path.replace(target)
+
+
+def start_metrics_dump(path: str, interval: float = DUMP_INTERVAL,
+                       registry: MetricsRegistry = REGISTRY) -> Callable[[], None]:
+    """Dump metrics to `path` every `interval` seconds. Returns a stop function that writes a final dump."""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            dump_metrics(path, registry)
+
+    thread = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+    thread.start()
+    print(f"📈 Dumping metrics to {path} every {interval:.0f}s")
+
+    def stop_dump():
+        stop.set()
+        thread.join()
+        dump_metrics(path, registry)
+
+    return stop_dump
+
+
+def start_metrics(port: Optional[int] = None, path: Optional[str] = None) -> Optional[Callable[[], None]]:
+    """Entry-point helper for the --metrics-port / --metrics-file flags; returns the file dump's stop function."""
+    if port:
+        start_metrics_server(port)
+    return start_metrics_dump(path) if path else None
+
+
+# ─── Catalog ────────────────────────────────────────────────
+SESSIONS_IN_FLIGHT = REGISTRY.gauge("agent_sessions_in_flight", "Agent sessions currently running.")
+SESSIONS = REGISTRY.counter("agent_sessions_total", "Finished agent sessions by outcome.", ["outcome"])
+SESSION_SECONDS = REGISTRY.histogram("agent_session_duration_seconds", "Wall time of one agent session.")
+STEPS_PER_SESSION = REGISTRY.histogram("agent_steps_per_session", "Plan steps created per session.",
+                                       buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21))
+REPLANS = REGISTRY.counter("agent_replans_total", "Plan revisions after an unhelpful step.")
+STAGE_SECONDS = REGISTRY.histogram("agent_stage_seconds", "Wall time per pipeline stage (memory search, "
+                                   "perception, decision, execution).", ["stage"])
+SPECULATIONS = REGISTRY.counter("agent_speculative_decisions_total", "Speculative next-step decisions by fate.",
+                                ["result"])
+
+LLM_SECONDS = REGISTRY.histogram("llm_request_seconds", "LLM call latency including retries.", ["module"])
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "LLM calls by module and outcome.", ["module", "outcome"])
+LLM_PROMPT_TOKENS = REGISTRY.histogram("llm_prompt_tokens", "Estimated prompt size in tokens.", ["module"],
+                                       buckets=(500, 1000, 2000, 4000, 8000, 12000, 16000, 32000))
+
+EXECUTOR_RUNS = REGISTRY.counter("executor_runs_total", "Sandboxed CODE executions by status.", ["status"])
+EXECUTOR_SECONDS = REGISTRY.histogram("executor_run_seconds", "Wall time of one sandboxed CODE execution.")
+
+TOOL_CALLS = REGISTRY.counter("mcp_tool_calls_total", "MCP tool calls by tool and outcome.", ["tool", "outcome"])
+TOOL_SECONDS = REGISTRY.histogram("mcp_tool_call_seconds", "MCP tool call latency.", ["tool"])
+
+SESSION_LOG_WRITES = REGISTRY.counter("session_log_writes_total", "Session log writes by outcome.", ["outcome"])
+SESSION_LOG_SECONDS = REGISTRY.histogram("session_log_write_seconds", "Time to write one session's pending "
+                                         "updates (background writer).",
+                                         buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+SESSION_LOG_QUEUE_DEPTH = REGISTRY.gauge("session_log_queue_depth", "Session updates waiting for the background writer.")
+SESSION_LOG_QUEUE_FULL = REGISTRY.counter("session_log_queue_full_total", "Session updates that waited for queue space.")
+SESSION_LOG_COALESCED = REGISTRY.counter("session_log_coalesced_records_total",
+                                         "Session log records dropped because a newer update superseded them.")
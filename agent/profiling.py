@@ -0,0 +1,193 @@
+"""
+Profiling mode for agent runs (`--profile DIR` on main.py, batch.py and service.py).
+
+Every query is run under cProfile with a per-thread CPU clock, so time spent blocked on the
+LLM or on MCP tools does not show up as hot code. Per query, DIR receives a `.prof` file
+(open with `python -m pstats` or snakeviz) and a line in `summary.jsonl` splitting wall time
+into LLM wait, tool wait and local CPU. On shutdown `aggregate.prof` and a hot-function
+report over all queries are written.
+
+cProfile is per thread and cannot attribute interleaved event-loop work to a session, so
+profiled queries run one at a time; LLM and memory calls in worker threads get their own
+profiler and are merged into the query's stats.
+"""
+import asyncio
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Optional
+
+DEFAULT_PROFILE_DIR = "profiles"
+TOP_FUNCTIONS = 25
+LLM_STAGES = ("perception", "decision")
+
+
+class QueryProfile:
+    """CPU profile of one query: the event-loop thread plus every worker-thread call it made."""
+
+    def __init__(self):
+        self.loop_profile = cProfile.Profile(time.thread_time)
+        self.worker_profiles: list[cProfile.Profile] = []
+        self.worker_cpu: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile(time.thread_time)
+            start = time.thread_time()
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self.worker_profiles.append(profile)
+                    self.worker_cpu[stage] = self.worker_cpu.get(stage, 0.0) + time.thread_time() - start
+
+        return profiled
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.loop_profile)
+        for profile in self.worker_profiles:
+            stats.add(profile)
+        return stats
+
+
+_active: ContextVar[Optional[QueryProfile]] = ContextVar("agent_query_profile", default=None)
+
+
+def profile_thread_call(stage: str, fn: Callable) -> Callable:
+    """Wrap a function about to run in a worker thread so it is profiled with the current query (if any)."""
+    profile = _active.get()
+    return profile.wrap(stage, fn) if profile is not None else fn
+
+
+def _cumulative_cpu(stats: pstats.Stats, filename_suffix: str, function: str) -> float:
+    return sum(
+        entry[3] for (filename, _, name), entry in stats.stats.items()
+        if name == function and filename.endswith(filename_suffix)
+    )
+
+
+class SessionProfiler:
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR, top: int = TOP_FUNCTIONS):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.top = top
+        self.aggregate: Optional[pstats.Stats] = None
+        self.breakdowns: list[dict] = []
+        self._lock = asyncio.Lock()
+        print(f"🔬 Profiling agent runs into {self.output_dir}/")
+
+    def wrap(self, agent_loop) -> "ProfiledAgentLoop":
+        return ProfiledAgentLoop(agent_loop, self)
+
+    async def run(self, agent_loop, query: str):
+        async with self._lock:
+            profile = QueryProfile()
+            token = _active.set(profile)
+            start = time.perf_counter()
+            profile.loop_profile.enable()
+            try:
+                session = await agent_loop.run(query)
+            finally:
+                profile.loop_profile.disable()
+                _active.reset(token)
+            wall = time.perf_counter() - start
+            self.record(profile, session, wall)
+            return session
+
+    def record(self, profile: QueryProfile, session, wall: float):
+        stats = profile.stats()
+        n = len(self.breakdowns) + 1
+        stats.dump_stats(self.output_dir / f"{n:04d}-{session.session_id[:8]}.prof")
+        if self.aggregate is None:
+            self.aggregate = stats
+        else:
+            self.aggregate.add(stats)
+
+        breakdown = self.breakdown(profile, stats, session, wall)
+        self.breakdowns.append(breakdown)
+        with open(self.output_dir / "summary.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(breakdown, ensure_ascii=False) + "\n")
+        print(f"🔬 Profile: wall {wall:.2f}s = LLM wait {breakdown['llm_wait']:.2f}s + tool wait "
+              f"{breakdown['tool_wait']:.2f}s + local CPU {breakdown['local_cpu']:.3f}s "
+              f"({breakdown['local_cpu_share']:.1%}) + other {breakdown['other_wait']:.2f}s")
+
+    @staticmethod
+    def breakdown(profile: QueryProfile, stats: pstats.Stats, session, wall: float) -> dict:
+        timings = session.timings
+        worker_cpu = sum(profile.worker_cpu.values())
+        loop_cpu = sum(entry[2] for entry in pstats.Stats(profile.loop_profile).stats.values())
+        execution_cpu = _cumulative_cpu(stats, "executor.py", "run_user_code")
+
+        llm_wall = sum(timings.get(stage, 0.0) for stage in LLM_STAGES)
+        llm_cpu = sum(profile.worker_cpu.get(stage, 0.0) for stage in LLM_STAGES)
+        llm_wait = max(0.0, llm_wall - llm_cpu)
+        tool_wait = max(0.0, timings.get("execution", 0.0) - execution_cpu)
+        local_cpu = loop_cpu + worker_cpu
+        return {
+            "session_id": session.session_id,
+            "query": session.original_query,
+            "wall": round(wall, 4),
+            "llm_wait": round(llm_wait, 4),
+            "tool_wait": round(tool_wait, 4),
+            "local_cpu": round(local_cpu, 4),
+            "local_cpu_share": round(local_cpu / wall, 4) if wall else 0.0,
+            "other_wait": round(max(0.0, wall - llm_wait - tool_wait - local_cpu), 4),
+            "cpu_by_stage": {
+                **{stage: round(cpu, 4) for stage, cpu in profile.worker_cpu.items()},
+                "execution": round(execution_cpu, 4),
+                "event_loop_other": round(max(0.0, loop_cpu - execution_cpu), 4),
+            },
+            "stage_wall": {stage: round(t, 4) for stage, t in timings.items()},
+        }
+
+    def report(self) -> str:
+        if self.aggregate is None:
+            return "No profiled queries."
+        totals = {key: sum(b[key] for b in self.breakdowns)
+                  for key in ("wall", "llm_wait", "tool_wait", "local_cpu", "other_wait")}
+        lines = [f"Profiled {len(self.breakdowns)} quer{'y' if len(self.breakdowns) == 1 else 'ies'}: "
+                 f"wall {totals['wall']:.2f}s, LLM wait {totals['llm_wait']:.2f}s, "
+                 f"tool wait {totals['tool_wait']:.2f}s, local CPU {totals['local_cpu']:.3f}s, "
+                 f"other {totals['other_wait']:.2f}s"]
+        stage_cpu: dict[str, float] = {}
+        for b in self.breakdowns:
+            for stage, cpu in b["cpu_by_stage"].items():
+                stage_cpu[stage] = stage_cpu.get(stage, 0.0) + cpu
+        lines.append("Local CPU by stage: " + ", ".join(
+            f"{stage} {cpu:.3f}s" for stage, cpu in sorted(stage_cpu.items(), key=lambda kv: -kv[1])))
+
+        out = io.StringIO()
+        self.aggregate.stream = out
+        self.aggregate.sort_stats("tottime").print_stats(self.top)
+        lines.append(f"Hot functions by own CPU time (top {self.top}):")
+        lines.append(out.getvalue().strip())
+        return "\n".join(lines)
+
+    def close(self):
+        if self.aggregate is not None:
+            self.aggregate.dump_stats(self.output_dir / "aggregate.prof")
+        report = self.report()
+        (self.output_dir / "report.txt").write_text(report + "\n", encoding="utf-8")
+        print(f"\n🔬 {report}")
+
+
+class ProfiledAgentLoop:
+    """Drop-in for AgentLoop whose `run` is profiled; everything else is delegated."""
+
+    def __init__(self, agent_loop, profiler: SessionProfiler):
+        self.agent_loop = agent_loop
+        self.profiler = profiler
+
+    async def run(self, query: str):
+        return await self.profiler.run(self.agent_loop, query)
+
+    def __getattr__(self, name):
+        return getattr(self.agent_loop, name)
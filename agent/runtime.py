@@ -0,0 +1,37 @@
+import yaml
+
+from agent.agent_loop2 import AgentLoop
+from memory.answer_cache import AnswerCache
+from memory.plan_cache import PlanCache
+
+MCP_SERVER_CONFIG_PATH = "config/mcp_server_config.yaml"
+PERCEPTION_PROMPT_PATH = "prompts/perception_prompt.txt"
+DECISION_PROMPT_PATH = "prompts/decision_prompt.txt"
+
+
+def load_mcp_server_configs(config_path: str = MCP_SERVER_CONFIG_PATH) -> list[dict]:
+    with open(config_path, 'r') as f:
+        mcp_server_config = yaml.safe_load(f)
+    return mcp_server_config.get("mcp_servers", [])
+
+
+async def start_multi_mcp(config_path: str = MCP_SERVER_CONFIG_PATH):
+    """Create and initialize the MultiMCP tool pool shared by every session of the process."""
+    from mcp_servers.multiMCP import MultiMCP
+
+    multi_mcp = MultiMCP(mcp_server_configs=load_mcp_server_configs(config_path))
+    await multi_mcp.initialize()
+    return multi_mcp
+
+
+def build_agent_loop(multi_mcp, strategy: str = "exploratory", use_plan_cache: bool = True,
+                     use_answer_cache: bool = True, **options) -> AgentLoop:
+    return AgentLoop(
+        perception_prompt_path=PERCEPTION_PROMPT_PATH,
+        decision_prompt_path=DECISION_PROMPT_PATH,
+        multi_mcp=multi_mcp,
+        strategy=strategy,
+        plan_cache=PlanCache() if use_plan_cache else None,
+        answer_cache=AnswerCache() if use_answer_cache else None,
+        **options
+    )
@@ -0,0 +1,215 @@
+"""
+Nested tracing spans for the agent pipeline, exported as JSONL.
+
+    session → memory_search / perception / decision → llm → executor → tool:<name>
+
+Each finished span is appended as one Chrome trace "complete" event (ph="X"), so the file is
+a valid event stream for chrome://tracing or https://ui.perfetto.dev once wrapped:
+
+    python -m agent.tracing traces.jsonl trace.json     # convert for the timeline viewer
+    python -m agent.tracing traces.jsonl --summary      # per-span latency table
+
+A session's spans share one timeline row; spans opened in other asyncio tasks or worker threads
+(speculative decisions, parallel tool calls, LLM calls in `to_thread`) get rows of their own,
+since overlapping events on one row don't render.
+
+Tracing is off until `enable_tracing(path)` is called; disabled spans only cost a clock read.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+TRACE_PATH_ENV = "AGENT_TRACE_FILE"
+MAX_ATTR_CHARS = 300
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: int
+    parent: Optional["Span"]
+    lane: int  # timeline row: one per session, plus one per concurrent task/worker thread inside it
+    unit: tuple[int, int] = (0, 0)  # (thread, asyncio task) the span was opened in
+    attrs: dict[str, Any] = field(default_factory=dict)
+    start_wall: float = field(default_factory=time.time)
+    start: float = field(default_factory=time.perf_counter)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class TraceExporter:
+    """Thread-safe JSONL appender; spans finish on the event loop and in worker threads."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span, duration: float):
+        event = {
+            "name": span.name,
+            "cat": span.name.split(":", 1)[0],
+            "ph": "X",
+            "ts": round(span.start_wall * 1e6),
+            "dur": round(duration * 1e6),
+            "pid": os.getpid(),
+            "tid": span.lane,
+            "args": {
+                "span_id": span.span_id,
+                "parent_id": span.parent.span_id if span.parent else None,
+                **{k: _clip(v) for k, v in span.attrs.items()}
+            }
+        }
+        line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("agent_trace_span", default=None)
+_exporter: Optional[TraceExporter] = None
+_ids = itertools.count(1)
+_lanes = itertools.count(1)
+
+
+def enable_tracing(path: str) -> TraceExporter:
+    global _exporter
+    if _exporter is not None:
+        _exporter.close()
+    _exporter = TraceExporter(path)
+    print(f"🔭 Tracing spans to {path}")
+    return _exporter
+
+
+def disable_tracing():
+    global _exporter
+    if _exporter is not None:
+        _exporter.close()
+        _exporter = None
+
+
+def enable_tracing_from_env() -> Optional[TraceExporter]:
+    path = os.getenv(TRACE_PATH_ENV)
+    return enable_tracing(path) if path else None
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a block as a child of the enclosing span. Context variables follow `asyncio` tasks and
+    `asyncio.to_thread`, so spans opened in worker threads still nest under their session.
+    """
+    parent = _current.get()
+    unit, lane = (0, 0), 0
+    if _exporter is not None:
+        # Chrome "X" events on one row must nest strictly: only spans of the same task/thread share a row
+        unit = _execution_unit()
+        lane = parent.lane if parent is not None and parent.unit == unit else next(_lanes)
+    current = Span(name=name, span_id=next(_ids), parent=parent, lane=lane, unit=unit, attrs=attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs.setdefault("outcome", "error")
+        current.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        current.attrs.setdefault("outcome", "ok")
+        if _exporter is not None:
+            _exporter.export(current, time.perf_counter() - current.start)
+
+
+def _execution_unit() -> tuple[int, int]:
+    """Spans opened in one thread and asyncio task close in reverse order, so they nest in time."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:  # worker thread without an event loop
+        task = None
+    return threading.get_ident(), id(task) if task is not None else 0
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def annotate(**attrs):
+    """Attach attributes to the innermost open span, if any."""
+    active = _current.get()
+    if active is not None:
+        active.set(**attrs)
+
+
+def _clip(value):
+    if isinstance(value, str) and len(value) > MAX_ATTR_CHARS:
+        return value[:MAX_ATTR_CHARS] + "…"
+    return value
+
+
+# ─── Offline tools ─────────────────────────────────────────
+def load_events(path: str) -> list[dict]:
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # torn last line from a crash
+    return events
+
+
+def to_chrome_trace(events: list[dict]) -> dict:
+    return {"traceEvents": sorted(events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}
+
+
+def summarize(events: list[dict]) -> list[dict]:
+    by_name: dict[str, list[float]] = {}
+    for event in events:
+        by_name.setdefault(event["name"], []).append(event["dur"] / 1000)
+    rows = []
+    for name, durations in by_name.items():
+        durations.sort()
+        rows.append({
+            "span": name,
+            "count": len(durations),
+            "total_ms": round(sum(durations), 1),
+            "p50_ms": round(durations[len(durations) // 2], 1),
+            "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 1),
+        })
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert or summarize agent trace JSONL files.")
+    parser.add_argument("input", help="JSONL trace written by enable_tracing()")
+    parser.add_argument("output", nargs="?", help="Chrome trace JSON to write (open in Perfetto or chrome://tracing)")
+    parser.add_argument("--summary", action="store_true", help="print per-span latency totals")
+    args = parser.parse_args()
+
+    events = load_events(args.input)
+    if args.output:
+        Path(args.output).write_text(json.dumps(to_chrome_trace(events)), encoding="utf-8")
+        print(f"Wrote {len(events)} spans to {args.output}")
+    if args.summary or not args.output:
+        print(f"{'span':<32}{'count':>8}{'total ms':>12}{'p50 ms':>10}{'p95 ms':>10}")
+        for row in summarize(events):
+            print(f"{row['span']:<32}{row['count']:>8}{row['total_ms']:>12}{row['p50_ms']:>10}{row['p95_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
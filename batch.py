@@ -0,0 +1,164 @@
+"""
+Batch query runner: push a JSONL file of queries through AgentLoop with bounded concurrency.
+
+    python batch.py queries.jsonl results.jsonl --concurrency 8
+
+Each input line is {"id": "...", "query": "..."} ("id" is optional and defaults to the line
+number) or a bare JSON string. One JSONL result is appended per query as soon as it finishes,
+so an interrupted run resumes where it stopped: ids already answered successfully are skipped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from agent.metrics import start_metrics
+from agent.profiling import DEFAULT_PROFILE_DIR, SessionProfiler
+from agent.runtime import build_agent_loop, start_multi_mcp
+from agent.tracing import TRACE_PATH_ENV, enable_tracing
+
+DEFAULT_CONCURRENCY = 4
+THREADS_PER_SESSION = 3  # perception + speculative decision + memory search
+
+
+def load_queries(path: Path) -> list[dict]:
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"query": item}
+            item.setdefault("id", str(line_no))
+            queries.append({"id": str(item["id"]), "query": item["query"]})
+    return queries
+
+
+def load_finished_ids(path: Path, retry_errors: bool = True) -> set[str]:
+    """Ids already present in the results file. A torn last line from a crash is ignored."""
+    finished = set()
+    if not path.exists():
+        return finished
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if result.get("status") == "ok" or not retry_errors:
+                finished.add(str(result["id"]))
+    return finished
+
+
+class BatchRunner:
+    def __init__(self, agent_loop, output_path: Path, concurrency: int = DEFAULT_CONCURRENCY):
+        self.agent_loop = agent_loop
+        self.output_path = output_path
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.done = 0
+        self.failed = 0
+
+    async def run(self, queries: list[dict]):
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.output_path, "a", encoding="utf-8") as out:
+            if self._ends_with_torn_line():
+                out.write("\n")
+            await asyncio.gather(*(self.run_one(item, out, len(queries)) for item in queries))
+
+    def _ends_with_torn_line(self) -> bool:
+        if not self.output_path.exists() or self.output_path.stat().st_size == 0:
+            return False
+        with open(self.output_path, "rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) != b"\n"
+
+    async def run_one(self, item: dict, out, total: int):
+        async with self.semaphore:
+            start = time.perf_counter()
+            result = {"id": item["id"], "query": item["query"]}
+            try:
+                session = await self.agent_loop.run(item["query"])
+                result.update({
+                    "status": "ok",
+                    "session_id": session.session_id,
+                    "original_goal_achieved": session.state["original_goal_achieved"],
+                    "solution_summary": session.state["solution_summary"],
+                    "final_answer": session.state["final_answer"],
+                    "step_counts": session.step_counts(),
+                    "timings": {stage: round(t, 4) for stage, t in session.timings.items()},
+                })
+            except Exception as e:
+                self.failed += 1
+                result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+
+            result["total_time"] = round(time.perf_counter() - start, 4)
+            # One flushed line per query keeps the file resumable after a crash
+            out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            self.done += 1
+            print(f"📦 [{self.done}/{total}] {item['id']}: {result['status']} in {result['total_time']:.1f}s")
+
+
+async def main(args):
+    input_path, output_path = Path(args.input), Path(args.output)
+    queries = load_queries(input_path)
+    finished = load_finished_ids(output_path, retry_errors=not args.no_retry_errors)
+    pending = [item for item in queries if item["id"] not in finished]
+    print(f"📥 {len(queries)} queries, {len(queries) - len(pending)} already done, {len(pending)} to run.")
+    if not pending:
+        return
+
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=args.concurrency * THREADS_PER_SESSION, thread_name_prefix="batch")
+    )
+
+    if args.trace:
+        enable_tracing(args.trace)
+    stop_metrics_dump = start_metrics(args.metrics_port, args.metrics_file)
+    print("Loading MCP Server...")
+    multi_mcp = await start_multi_mcp(args.config)
+    agent_loop = build_agent_loop(multi_mcp, strategy=args.strategy, speculative=args.speculative,
+                                  multi_step=args.multi_step)
+    profiler = SessionProfiler(args.profile) if args.profile else None
+    if profiler:
+        agent_loop = profiler.wrap(agent_loop)
+
+    runner = BatchRunner(agent_loop, output_path, concurrency=args.concurrency)
+    start = time.perf_counter()
+    await runner.run(pending)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Batch finished: {runner.done} run, {runner.failed} failed, {elapsed:.1f}s "
+          f"({runner.done / elapsed if elapsed else 0:.2f} queries/s).")
+    if profiler:
+        profiler.close()
+    if stop_metrics_dump:
+        stop_metrics_dump()
+    await multi_mcp.shutdown()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("output", help="JSONL file of results (appended to, and used to resume)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--strategy", default="exploratory", choices=["exploratory", "conservative"])
+    parser.add_argument("--speculative", action="store_true", help="overlap next-step decisions with perception")
+    parser.add_argument("--multi-step", action="store_true", help="run multi-step CODE plans without LLM calls between steps")
+    parser.add_argument("--no-retry-errors", action="store_true", help="on resume, skip queries that errored too")
+    parser.add_argument("--trace", default=os.getenv(TRACE_PATH_ENV), metavar="PATH",
+                        help=f"append tracing spans as JSONL (default: ${TRACE_PATH_ENV})")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help=f"profile each query into DIR (default: {DEFAULT_PROFILE_DIR}); queries then run one at a time")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port")
+    parser.add_argument("--metrics-file", help="periodically dump Prometheus metrics to this file")
+    parser.add_argument("--config", default="config/mcp_server_config.yaml")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,283 @@
+"""
+End-to-end AgentLoop benchmark against a scripted LLM and in-process fake MCP tools.
+
+Measures startup time, queries per second, per-stage latency percentiles and memory growth
+over many sessions. Everything runs in a scratch directory, so session logs and caches from
+real use are neither read nor touched.
+
+    python benchmarks/agent_e2e.py --json bench/e2e.json
+    python benchmarks/agent_e2e.py --llm-latency 0.3 --tool-latency 0.05 --concurrency 16
+    python benchmarks/agent_e2e.py --memory-sessions 0 --compare bench/e2e_main.json
+
+With the default zero latencies the numbers are pure framework overhead (prompt building,
+JSON parsing, AST transforms, session logging, memory search).
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fakes import SCENARIOS, FakeGenaiClient, FakeMultiMCP  # noqa: E402
+
+PERCEPTION_PROMPT_PATH = str(ROOT / "prompts/perception_prompt.txt")
+DECISION_PROMPT_PATH = str(ROOT / "prompts/decision_prompt.txt")
+SESSION_LOG_DIR = Path("memory/session_logs")
+MEMORY_BATCH = 500
+LOG_WINDOW = 200  # session files kept during the memory run so memory search cost stays flat
+
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from agent.agent_loop2 import AgentLoop
+from benchmarks.fakes import FakeMultiMCP
+imported = time.perf_counter()
+AgentLoop({perception!r}, {decision!r}, FakeMultiMCP())
+print(json.dumps({{"import_s": imported - start, "construct_s": time.perf_counter() - imported}}))
+"""
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 3),
+        "p50_ms": round(1000 * pick(0.50), 3),
+        "p95_ms": round(1000 * pick(0.95), 3),
+        "p99_ms": round(1000 * pick(0.99), 3),
+        "max_ms": round(1000 * ordered[-1], 3),
+    }
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, KiB on Linux
+
+
+def git_commit() -> str:
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or "unknown"
+
+
+def prune_session_logs(keep: int):
+    from memory.session_log import flush_session_writes
+    flush_session_writes()  # finished sessions may still be queued in the background writer
+    files = sorted(SESSION_LOG_DIR.rglob("*.json"), key=lambda p: p.stat().st_mtime)
+    for path in files[:-keep] if keep else files:
+        path.unlink()
+
+
+# ─── Phases ────────────────────────────────────────────────
+def bench_startup(runs: int) -> dict:
+    code = STARTUP_PROBE.format(root=str(ROOT), perception=PERCEPTION_PROMPT_PATH, decision=DECISION_PROMPT_PATH)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        wall = time.perf_counter() - start
+        if proc.returncode:
+            return {"error": proc.stderr.strip().splitlines()[-1]}
+        samples.append({**json.loads(proc.stdout.strip().splitlines()[-1]), "process_s": wall})
+    return {key: round(sorted(s[key] for s in samples)[len(samples) // 2], 4) for key in samples[0]}
+
+
+async def run_sessions(agent_loop, queries: list[str], concurrency: int) -> tuple[list, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def one(query):
+        async with semaphore:
+            start = time.perf_counter()
+            session = await agent_loop.run(query)
+            results.append((session, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    return results, time.perf_counter() - start
+
+
+async def bench_throughput(agent_loop, sessions: int, concurrency: int) -> dict:
+    queries = [f"[{SCENARIOS[i % len(SCENARIOS)]}] benchmark query {i}" for i in range(sessions)]
+    results, elapsed = await run_sessions(agent_loop, queries, concurrency)
+
+    stages: dict[str, list[float]] = {}
+    for session, _ in results:
+        for stage, seconds in session.timings.items():
+            stages.setdefault(stage, []).append(seconds)
+    return {
+        "sessions": len(results),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "queries_per_second": round(len(results) / elapsed, 2) if elapsed else None,
+        "goal_achieved_rate": round(sum(s.state["original_goal_achieved"] for s, _ in results) / len(results), 4),
+        "session_latency": percentiles([latency for _, latency in results]),
+        "stages": {stage: percentiles(values) for stage, values in sorted(stages.items())},
+    }
+
+
+async def bench_memory(agent_loop, sessions: int, concurrency: int) -> dict:
+    gc.collect()
+    baseline = rss_mb()
+    samples = [{"sessions": 0, "rss_mb": round(baseline, 2)}]
+    done = 0
+    while done < sessions:
+        batch = min(MEMORY_BATCH, sessions - done)
+        queries = [f"[{SCENARIOS[i % len(SCENARIOS)]}] memory query {i}" for i in range(done, done + batch)]
+        await run_sessions(agent_loop, queries, concurrency)
+        done += batch
+        prune_session_logs(LOG_WINDOW)
+        gc.collect()
+        samples.append({"sessions": done, "rss_mb": round(rss_mb(), 2), "gc_objects": len(gc.get_objects())})
+
+    # Growth after warm-up: ignore the first batch, which fills import-time and cache structures
+    warm = samples[1] if len(samples) > 2 else samples[0]
+    growth = samples[-1]["rss_mb"] - warm["rss_mb"]
+    sessions_after_warmup = samples[-1]["sessions"] - warm["sessions"]
+    return {
+        "sessions": done,
+        "baseline_rss_mb": round(baseline, 2),
+        "final_rss_mb": samples[-1]["rss_mb"],
+        "growth_kb_per_session": round(1024 * growth / sessions_after_warmup, 3) if sessions_after_warmup else None,
+        "samples": samples,
+    }
+
+
+async def run_benchmarks(args) -> dict:
+    from agent.agent_loop2 import AgentLoop
+    from llm.client import set_client
+    from memory.answer_cache import AnswerCache
+    from memory.plan_cache import PlanCache
+
+    set_client(FakeGenaiClient(args.llm_latency))
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max(4, args.concurrency * 3)))
+    agent_loop = AgentLoop(
+        PERCEPTION_PROMPT_PATH, DECISION_PROMPT_PATH, FakeMultiMCP(args.tool_latency),
+        strategy=args.strategy, speculative=args.speculative, multi_step=args.multi_step,
+        plan_cache=PlanCache() if args.caches else None,
+        answer_cache=AnswerCache() if args.caches else None,
+    )
+
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Agent prints still run (their formatting cost is real) but don't hit the terminal
+        await run_sessions(agent_loop, [f"[{s}] warm-up" for s in SCENARIOS], 1)
+        prune_session_logs(0)
+        results["throughput"] = await bench_throughput(agent_loop, args.sessions, args.concurrency)
+        if args.memory_sessions:
+            prune_session_logs(0)
+            results["memory"] = await bench_memory(agent_loop, args.memory_sessions, args.concurrency)
+    return results
+
+
+# ─── Reporting ─────────────────────────────────────────────
+def flatten(report: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in report.items():
+        if key in {"meta", "samples"}:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current: dict, baseline_path: str):
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    old, new = flatten(baseline), flatten(current)
+    print(f"\nComparison with {baseline_path} ({baseline.get('meta', {}).get('commit', '?')} → "
+          f"{current['meta']['commit']}):")
+    print(f"{'metric':<48}{'baseline':>12}{'current':>12}{'change':>10}")
+    for key in sorted(old.keys() & new.keys()):
+        change = f"{(new[key] - old[key]) / old[key]:+.1%}" if old[key] else "n/a"
+        print(f"{key:<48}{old[key]:>12}{new[key]:>12}{change:>10}")
+
+
+def print_summary(report: dict):
+    startup = report.get("startup", {})
+    if startup:
+        print(f"Startup: process {startup.get('process_s')}s, import {startup.get('import_s')}s, "
+              f"construct {startup.get('construct_s')}s")
+    tp = report["throughput"]
+    print(f"Throughput: {tp['sessions']} sessions at concurrency {tp['concurrency']} → "
+          f"{tp['queries_per_second']} q/s (goal achieved {tp['goal_achieved_rate']:.0%})")
+    print(f"Session latency: p50 {tp['session_latency']['p50_ms']} ms, p95 {tp['session_latency']['p95_ms']} ms, "
+          f"p99 {tp['session_latency']['p99_ms']} ms")
+    for stage, stats in tp["stages"].items():
+        print(f"  {stage:<14} p50 {stats['p50_ms']:>9} ms   p95 {stats['p95_ms']:>9} ms   p99 {stats['p99_ms']:>9} ms")
+    if "memory" in report:
+        mem = report["memory"]
+        print(f"Memory: {mem['sessions']} sessions, RSS {mem['baseline_rss_mb']} → {mem['final_rss_mb']} MB "
+              f"({mem['growth_kb_per_session']} KB/session after warm-up)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300, help="sessions in the throughput/latency phase")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--memory-sessions", type=int, default=10_000, help="sessions in the memory growth phase (0 skips)")
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.0, help="seconds per fake tool call")
+    parser.add_argument("--strategy", default="exploratory", choices=["exploratory", "conservative"])
+    parser.add_argument("--speculative", action="store_true")
+    parser.add_argument("--multi-step", action="store_true")
+    parser.add_argument("--caches", action="store_true", help="enable the plan and answer caches")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="print changes against an earlier --json report")
+    args = parser.parse_args()
+
+    report = {"meta": {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "args": vars(args),
+    }}
+    if args.startup_runs:
+        report["startup"] = bench_startup(args.startup_runs)
+
+    workdir = tempfile.mkdtemp(prefix="agent_bench_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        report.update(asyncio.run(run_benchmarks(args)))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_summary(report)
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {args.json}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Import-time benchmark for the agent packages.
+
+Runs each import in a fresh interpreter with `-X importtime` (no GEMINI_API_KEY in the
+environment, so anything that builds a client at import time fails loudly) and reports
+wall time plus the heaviest modules.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --json bench_output.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TARGETS = [
+    "agent.agent_loop2",
+    "perception.perception",
+    "decision.decision",
+    "memory.memory_search",
+]
+
+
+def measure(module: str) -> dict:
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative.strip())
+
+    return {
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "wall_s": wall,
+        "import_us": modules.get(module, 0),
+        "modules": modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest modules to list per target")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for module in TARGETS:
+        runs = [measure(module) for _ in range(args.runs)]
+        failed = [r for r in runs if not r["ok"]]
+        if failed:
+            print(f"❌ {module}: import failed: {failed[0]['error']}")
+            results[module] = {"ok": False, "error": failed[0]["error"]}
+            continue
+
+        import_ms = [r["import_us"] / 1000 for r in runs]
+        heaviest = sorted(
+            ((name, us) for name, us in runs[-1]["modules"].items() if name.count(".") == 0 and name != module),
+            key=lambda item: item[1], reverse=True
+        )[:args.top]
+        results[module] = {
+            "ok": True,
+            "import_ms_median": statistics.median(import_ms),
+            "import_ms_min": min(import_ms),
+            "wall_ms_median": statistics.median(r["wall_s"] * 1000 for r in runs),
+            "heaviest": {name: us / 1000 for name, us in heaviest},
+        }
+
+        print(f"✅ {module}: {results[module]['import_ms_median']:.1f} ms median import "
+              f"({results[module]['wall_ms_median']:.0f} ms interpreter wall)")
+        for name, ms in results[module]["heaviest"].items():
+            print(f"    {name:<28} {ms:8.1f} ms")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"📝 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+MemorySearch scoring benchmark on synthetic memory entries.
+
+Compares the batch scorer (`ScoringTable`: pre-lowercased columns, `rapidfuzz.process.cdist`
+with worker threads, NumPy weighting, summaries scored only where they can still reach the
+top-k, argpartition top-k) with the previous per-entry loop
+(two `fuzz.partial_ratio` calls per entry, lowercasing every time, full sort). Both must return
+the same top-k; the loop is skipped above --legacy-max entries because it takes minutes there.
+
+    python benchmarks/memory_search.py
+    python benchmarks/memory_search.py --entries 10000 100000 1000000 --json bench/memory_search.json
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from rapidfuzz import fuzz
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from memory.memory_scoring import ScoringTable  # noqa: E402
+
+WORDS = ("ascii values india sum exponentials factorial fibonacci numbers cube root log convert string "
+         "characters integer list average weather paris population capital country download page summary "
+         "markdown pdf extract search documents stored latest news price bitcoin stock python tutorial").split()
+QUERIES = ["Find the ASCII values of characters in INDIA", "What is the factorial of 12?",
+           "summarize the latest news about bitcoin", "population of the capital of France"]
+
+
+def make_entries(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        query = " ".join(rng.choices(WORDS, k=rng.randint(4, 12))).capitalize()
+        summary = " ".join(rng.choices(WORDS, k=rng.randint(5, 30)))
+        entries.append({"file": f"session-{i}.json", "query": query, "result_requirement": "",
+                        "solution_summary": summary})
+    return entries
+
+
+def legacy_search(entries: list[dict], user_query: str, top_k: int) -> list[dict]:
+    """`MemorySearch.search_memory` scoring before the batch scorer."""
+    scored_results = []
+    for entry in entries:
+        query_score = fuzz.partial_ratio(user_query.lower(), entry["query"].lower())
+        summary_score = fuzz.partial_ratio(user_query.lower(), entry["solution_summary"].lower())
+        length_penalty = len(entry["solution_summary"]) / 100
+        score = 0.5 * query_score + 0.4 * summary_score - 0.05 * length_penalty
+        scored_results.append((score, entry))
+    top_matches = sorted(scored_results, key=lambda x: x[0], reverse=True)[:top_k]
+    return [match[1] for match in top_matches]
+
+
+def timed(fn) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=100_000, help="largest size to also run the old loop on")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for count in args.entries:
+        entries = make_entries(count)
+        build_s, table = timed(lambda: ScoringTable(entries))
+        batch_times, legacy_times = [], []
+        for query in QUERIES:
+            seconds, top = timed(lambda: table.top(query, args.top_k))
+            batch_times.append(seconds)
+            if count <= args.legacy_max:
+                seconds, expected = timed(lambda: legacy_search(entries, query, args.top_k))
+                legacy_times.append(seconds)
+                if [e["file"] for e in top] != [e["file"] for e in expected]:
+                    print(f"❌ {count} entries, '{query}': batch top-{args.top_k} differs from the legacy loop")
+                    sys.exit(1)
+
+        results[count] = {
+            "table_build_ms": build_s * 1000,
+            "batch_median_ms": statistics.median(batch_times) * 1000,
+            "legacy_median_ms": statistics.median(legacy_times) * 1000 if legacy_times else None,
+        }
+        row = results[count]
+        legacy = (f"legacy {row['legacy_median_ms']:9.1f} ms  ({row['legacy_median_ms'] / row['batch_median_ms']:.1f}x)"
+                  if legacy_times else "legacy   skipped")
+        print(f"{count:>9,} entries  table build {row['table_build_ms']:8.1f} ms  "
+              f"batch {row['batch_median_ms']:8.1f} ms  {legacy}")
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"📝 Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Session serialization benchmark: `AgentSession.to_json` + encoding, for sessions with many steps.
+
+Compares the current single-pass path (explicit `to_dict`, each step converted once, compact
+C-accelerated encoding) with the previous one (`dataclasses.asdict` per step for plan_versions
+and again for the snapshot summary, then `json.dumps(indent=2)`), on time per session and
+peak allocation measured with tracemalloc.
+
+    python benchmarks/session_serialization.py
+    python benchmarks/session_serialization.py --steps 100 500 2000 --json bench/serialize.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from agent.agent_session import AgentSession, PerceptionSnapshot, Step, ToolCode  # noqa: E402
+
+STEPS_PER_VERSION = 5
+
+
+def build_session(steps: int) -> AgentSession:
+    """A session with `steps` CODE steps spread over replanned versions, all with results and perceptions."""
+    session = AgentSession("bench-session", "Find the ASCII values of INDIA and sum their exponentials")
+    perception = PerceptionSnapshot(
+        entities=["INDIA", "ASCII", "exponential"], result_requirement="A single number.",
+        original_goal_achieved=False, reasoning="The tool returned intermediate values." * 3,
+        local_goal_achieved=True, local_reasoning="Step output looks right.",
+        last_tooluse_summary="strings_to_chars_to_int returned 5 values",
+        solution_summary="Not ready yet.", confidence="0.8")
+    session.add_perception(perception)
+    for first in range(0, steps, STEPS_PER_VERSION):
+        batch = []
+        for index in range(first, min(first + STEPS_PER_VERSION, steps)):
+            batch.append(Step(
+                index=index, description=f"Step {index}: convert and sum", type="CODE",
+                code=ToolCode("raw_code_block", {"code": "result = int_list_to_exponential_sum([73, 78, 68, 73, 65])\n"
+                                                         "return result"}),
+                execution_result={"status": "success", "result": str(7.59982224609308e+33),
+                                  "execution_time": "2025-01-01 00:00:00", "total_time": "0.012"},
+                perception=perception, status="completed" if index % 2 else "failed", attempts=1))
+        session.add_plan_version([f"Step {i}: ..." for i in range(len(batch))], batch)
+    session.timings = {"perception": 1.2, "decision": 2.3, "execution": 0.4}
+    return session
+
+
+def legacy_to_json(session: AgentSession) -> dict:
+    """`AgentSession.to_json` before the single-pass serializer."""
+    return {
+        "session_id": session.session_id,
+        "original_query": session.original_query,
+        "created_at": session.created_at,
+        "perception": asdict(session.perception) if session.perception else None,
+        "plan_versions": [
+            {"plan_text": p["plan_text"], "steps": [asdict(s) for s in p["steps"]]}
+            for p in session.plan_versions
+        ],
+        "state_snapshot": {
+            "session_id": session.session_id,
+            "query": session.original_query,
+            "final_plan": session.plan_versions[-1]["plan_text"] if session.plan_versions else [],
+            "final_steps": [asdict(s) for v in session.plan_versions for s in v["steps"] if s.status == "completed"],
+            "final_answer": session.state["final_answer"],
+            "confidence": session.state["confidence"],
+            "reasoning_note": session.state["reasoning_note"]
+        },
+        "state": session.state,
+        "timings": session.timings
+    }
+
+
+PATHS = {
+    "legacy": lambda session: json.dumps(legacy_to_json(session), indent=2),
+    "current": lambda session: json.dumps(session.to_json(), ensure_ascii=False, separators=(",", ":"), default=str),
+}
+
+
+def measure(encode, session: AgentSession, repeats: int) -> dict:
+    encode(session)  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        encoded = encode(session)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    encode(session)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": statistics.median(times) * 1000, "peak_kb": peak / 1024, "bytes": len(encoded)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for steps in args.steps:
+        session = build_session(steps)
+        if json.loads(PATHS["legacy"](session)) != json.loads(PATHS["current"](session)):
+            print(f"❌ {steps} steps: current serializer output differs from the legacy one")
+            sys.exit(1)
+        results[steps] = {name: measure(encode, session, args.repeats) for name, encode in PATHS.items()}
+
+        legacy, current = results[steps]["legacy"], results[steps]["current"]
+        print(f"{steps:>5} steps  legacy {legacy['median_ms']:8.2f} ms {legacy['peak_kb']:9.0f} KB peak "
+              f"{legacy['bytes'] / 1024:7.0f} KB out   current {current['median_ms']:8.2f} ms "
+              f"{current['peak_kb']:9.0f} KB peak {current['bytes'] / 1024:7.0f} KB out   "
+              f"({legacy['median_ms'] / current['median_ms']:.1f}x faster)")
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"📝 Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
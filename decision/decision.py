@@ -1,70 +1,78 @@
+from __future__ import annotations
+
 import json
-import os
-import re
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from dotenv import load_dotenv
-from google import genai
-from google.genai.errors import ServerError
-
-from mcp_servers.multiMCP import MultiMCP
+from agent.metrics import LLM_PROMPT_TOKENS, LLM_REQUESTS, LLM_SECONDS
+from agent.tracing import span
+from llm.client import get_client
+from llm.prompt_budget import DECISION_TOKEN_BUDGET, PromptBudget, estimate_tokens
+from llm.resilience import LLMUnavailableError, ResilientLLM
+from llm.streaming import read_json_stream
 
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=api_key)
+if TYPE_CHECKING:
+    from mcp_servers.multiMCP import MultiMCP
 
 
 class Decision:
     def __init__(self, decision_prompt_path: str, multi_mcp: MultiMCP, api_key: str | None = None,
-                 model: str = "gemini-2.0-flash"):
-        load_dotenv()
+                 model: str = "gemini-2.0-flash", token_budget: int = DECISION_TOKEN_BUDGET, hedge: bool = False):
         self.decision_prompt_path = decision_prompt_path
         self.multi_mcp = multi_mcp
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment or explicitly provided.")
-        self.client = genai.Client(api_key=self.api_key)
+        self.api_key = api_key
+        self.model = model
+        self.budget = PromptBudget(token_budget, label="Decision prompt")
+        self.llm = ResilientLLM("Decision", hedge=hedge)
+
+    @property
+    def client(self):
+        return get_client(self.api_key)
 
     def run(self, decision_input: dict) -> dict:
         prompt_template = Path(self.decision_prompt_path).read_text(encoding="utf-8")
         function_list_text = self.multi_mcp.tool_description_wrapper()
         tool_descriptions = "\n".join(f"- `{desc.strip()}`" for desc in function_list_text)
         tool_descriptions = "\n\n### The ONLY Available Tools\n\n---\n\n" + tool_descriptions
+        decision_input = self.budget.fit(
+            decision_input, reserved_tokens=estimate_tokens(prompt_template) + estimate_tokens(tool_descriptions)
+        )
         full_prompt = f"{prompt_template.strip()}\n{tool_descriptions}\n\n```json\n{json.dumps(decision_input, indent=2)}\n```"
 
-        try:
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=full_prompt
-            )
-        except ServerError as e:
-            print(f"🚫 Decision LLM ServerError: {e}")
-            return {
-                "step_index": 0,
-                "description": "Decision model unavailable: server overload.",
-                "type": "NOP",
-                "code": "",
-                "conclusion": "",
-                "plan_text": ["Step 0: Decision model returned a 503. Exiting to avoid loop."],
-                "raw_text": str(e)
-            }
+        prompt_tokens = estimate_tokens(full_prompt)
+        LLM_PROMPT_TOKENS.observe(prompt_tokens, module="decision")
+        with span("llm:decision", model=self.model, prompt_chars=len(full_prompt),
+                  prompt_tokens=prompt_tokens) as llm_span, LLM_SECONDS.time(module="decision"):
+            try:
+                # Stream and stop reading as soon as the ```json block closes
+                parser = self.llm.call(lambda: read_json_stream(self.client.models.generate_content_stream(
+                    model=self.model,
+                    contents=full_prompt
+                )))
+            except LLMUnavailableError as e:
+                print(f"🚫 Decision LLM unavailable: {e}")
+                llm_span.set(outcome="unavailable")
+                LLM_REQUESTS.inc(module="decision", outcome="unavailable")
+                return {
+                    "step_index": 0,
+                    "description": "Decision model unavailable: server overload.",
+                    "type": "NOP",
+                    "code": "",
+                    "conclusion": "",
+                    "plan_text": ["Step 0: Decision model returned a 503. Exiting to avoid loop."],
+                    "raw_text": str(e)
+                }
+            llm_span.set(response_chars=len(parser.text))
+            LLM_REQUESTS.inc(module="decision", outcome="ok")
 
-        raw_text = response.candidates[0].content.parts[0].text.strip()
+        raw_text = parser.text.strip()
 
         try:
-            match = re.search(r"```json\s*(\{.*?\})\s*```", raw_text, re.DOTALL)
-            if not match:
-                raise ValueError("No JSON block found")
-
-            json_block = match.group(1)
             try:
-                output = json.loads(json_block)
-            except json.JSONDecodeError as e:
-                print("⚠️ JSON decode failed, attempting salvage via regex...")
-
-                # Attempt to extract a 'code' block manually
-                code_match = re.search(r'code\s*:\s*"(.*?)"', json_block, re.DOTALL)
-                code_value = bytes(code_match.group(1), "utf-8").decode("unicode_escape") if code_match else ""
+                output = parser.parse()
+            except json.JSONDecodeError:
+                print("⚠️ JSON decode failed, attempting to salvage the code field...")
+                code_value = parser.salvage_string("code") or ""
 
                 output = {
                     "step_index": 0,
@@ -80,6 +88,20 @@ class Decision:
             if "next_step" in output:
                 output.update(output.pop("next_step"))
 
+            # Multi-step batch: the first step doubles as the top-level step for single-step callers
+            steps = output.get("steps")
+            if isinstance(steps, list) and steps and all(isinstance(s, dict) for s in steps):
+                for i, step in enumerate(steps):
+                    step.setdefault("step_index", output.get("step_index", 0) + i)
+                    step.setdefault("description", "Missing from LLM response")
+                    step.setdefault("type", "CODE")
+                    step.setdefault("code", "")
+                    step.setdefault("conclusion", "")
+                for key in ("step_index", "description", "type", "code", "conclusion"):
+                    output.setdefault(key, steps[0][key])
+            else:
+                output.pop("steps", None)
+
             defaults = {
                 "step_index": 0,
                 "description": "Missing from LLM response",
@@ -94,8 +116,6 @@ class Decision:
             return output
 
         except Exception as e:
-            import pdb;
-            pdb.set_trace()
             print("❌ Unrecoverable exception while parsing LLM response:", str(e))
             return {
                 "step_index": 0,
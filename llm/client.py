@@ -0,0 +1,64 @@
+import os
+import threading
+from typing import Any, Optional
+
+# ───────────────────────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────────────────────
+
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE_CONNECTIONS = 16
+KEEPALIVE_EXPIRY = 60.0  # seconds
+REQUEST_TIMEOUT = 120.0  # seconds
+
+_clients: dict[Optional[str], Any] = {}
+_lock = threading.Lock()
+
+
+def get_client(api_key: Optional[str] = None):
+    """
+    Return the process-wide Gemini client, creating it (and its pooled HTTP client) on first use.
+    Nothing here runs at import time, so importing the agent needs neither the SDK nor an API key.
+    """
+    client = _clients.get(api_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        if api_key not in _clients:
+            _clients[api_key] = _create_client(api_key)
+        return _clients[api_key]
+
+
+def set_client(client, api_key: Optional[str] = None) -> None:
+    """Install a ready-made client (fakes for benchmarks, preconfigured clients for services)."""
+    with _lock:
+        _clients[api_key] = client
+
+
+def reset_clients() -> None:
+    with _lock:
+        _clients.clear()
+
+
+def _create_client(api_key: Optional[str]):
+    import httpx
+    from dotenv import load_dotenv
+    from google import genai
+    from google.genai import types
+
+    load_dotenv()
+    key = api_key or os.getenv("GEMINI_API_KEY")
+    if not key:
+        raise ValueError("GEMINI_API_KEY not found in environment or explicitly provided.")
+
+    # One keep-alive pool shared by every Perception/Decision call in the process
+    pool_args = {
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        "timeout": REQUEST_TIMEOUT,
+    }
+    return genai.Client(api_key=key, http_options=types.HttpOptions(client_args=pool_args))
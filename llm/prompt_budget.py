@@ -0,0 +1,147 @@
+import json
+from typing import Any
+
+# ───────────────────────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────────────────────
+
+CHARS_PER_TOKEN = 4  # rough heuristic, good enough for budgeting
+PERCEPTION_TOKEN_BUDGET = 8000
+DECISION_TOKEN_BUDGET = 12000
+MIN_FIELD_CHARS = 240  # never cut a field below this many characters
+TRUNCATION_MARKER = " …[truncated {cut} chars]"
+# list-like sections that may lose whole items once every field is at MIN_FIELD_CHARS, with the end to drop from
+DROPPABLE_SECTIONS = {
+    "completed_steps": "first",  # oldest step first
+    "memory_excerpt": "last",  # weakest memory match first
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def measure_sections(payload: dict) -> dict[str, int]:
+    """Estimated token size of each top-level section of a prompt payload."""
+    return {
+        key: estimate_tokens(json.dumps(value, indent=2, ensure_ascii=False, default=str))
+        for key, value in payload.items()
+    }
+
+
+class PromptBudget:
+    """
+    Enforce a per-call token budget on the JSON payload embedded in an LLM prompt.
+    The largest string fields (execution results, memory summaries, ...) are cut first,
+    so small structural fields like plan text and step indexes survive untouched. If that
+    isn't enough, whole completed steps and memory excerpts are dropped, oldest/weakest first.
+    """
+
+    def __init__(self, max_tokens: int, label: str = "Prompt", min_field_chars: int = MIN_FIELD_CHARS):
+        self.max_tokens = max_tokens
+        self.label = label
+        self.min_field_chars = min_field_chars
+
+    def fit(self, payload: dict, reserved_tokens: int = 0) -> dict:
+        """
+        Return a copy of `payload` that fits in the budget once `reserved_tokens`
+        (prompt template, tool descriptions) are accounted for.
+        """
+        compacted = json.loads(json.dumps(payload, ensure_ascii=False, default=str))
+        before = estimate_tokens(self._dump(compacted)) + reserved_tokens
+        if before <= self.max_tokens:
+            return compacted
+
+        sections_before = measure_sections(compacted)
+        excess_chars = (before - self.max_tokens) * CHARS_PER_TOKEN
+        leaves = sorted(self._string_leaves(compacted), key=lambda leaf: len(leaf[0][leaf[1]]), reverse=True)
+        cap = self._find_cap([len(c[k]) for c, k in leaves], excess_chars)
+
+        cut_chars, cut_fields = 0, 0
+        for container, key in leaves:
+            length = len(container[key])
+            if length <= cap + len(TRUNCATION_MARKER):
+                break
+            container[key] = self._truncate(container[key], cap)
+            cut_chars += length - cap
+            cut_fields += 1
+
+        after = estimate_tokens(self._dump(compacted)) + reserved_tokens
+        dropped = self._drop_items(compacted, reserved_tokens) if after > self.max_tokens else {}
+        if dropped:
+            after = estimate_tokens(self._dump(compacted)) + reserved_tokens
+        sections_after = measure_sections(compacted)
+        trimmed = {
+            k: f"{sections_before[k]}→{sections_after[k]}"
+            for k in sections_before if sections_after.get(k) != sections_before[k]
+        }
+        print(f"✂️ {self.label} budget: ~{before} → ~{after} tokens (limit {self.max_tokens}), "
+              f"cut {cut_chars} chars across {cut_fields} field(s) {trimmed}")
+        if dropped:
+            print(f"✂️ {self.label} budget: dropped {', '.join(f'{n} {k}' for k, n in dropped.items())} item(s).")
+        if after > self.max_tokens:
+            print(f"⚠️ {self.label} still over budget after compaction; sending as is.")
+
+        return compacted
+
+    def _find_cap(self, lengths: list[int], excess_chars: int) -> int:
+        """
+        Largest per-field cap that saves at least `excess_chars`, so the biggest fields
+        are levelled down first. Never goes below `min_field_chars`.
+        """
+        overhead = len(TRUNCATION_MARKER) + 6
+        saved, cap = 0, self.min_field_chars
+        for i, length in enumerate(lengths):
+            next_len = lengths[i + 1] if i + 1 < len(lengths) else 0
+            floor = max(next_len, self.min_field_chars)
+            # Lower the cap over the first i + 1 fields from `length` down to `floor`
+            gain = (length - floor) * (i + 1)
+            if saved + gain >= excess_chars:
+                return max(self.min_field_chars, length - (excess_chars - saved) // (i + 1) - overhead)
+            saved += gain
+            cap = floor
+            if floor == self.min_field_chars:
+                break
+        return cap
+
+    def _drop_items(self, payload: dict, reserved_tokens: int) -> dict[str, int]:
+        """Drop items from the largest droppable section until the payload fits; returns counts per section."""
+        dropped: dict[str, int] = {}
+        while estimate_tokens(self._dump(payload)) + reserved_tokens > self.max_tokens:
+            sizes = {
+                key: size for key, size in measure_sections(payload).items()
+                if key in DROPPABLE_SECTIONS and isinstance(payload[key], (list, dict)) and payload[key]
+            }
+            if not sizes:
+                break
+            key = max(sizes, key=sizes.get)
+            items = payload[key]
+            if isinstance(items, list):
+                items.pop(0 if DROPPABLE_SECTIONS[key] == "first" else -1)
+            else:
+                del items[next(iter(items)) if DROPPABLE_SECTIONS[key] == "first" else next(reversed(items))]
+            dropped[key] = dropped.get(key, 0) + 1
+        return dropped
+
+    def _string_leaves(self, obj: Any):
+        if isinstance(obj, dict):
+            for k, v in obj.items():
+                if isinstance(v, str):
+                    yield obj, k
+                else:
+                    yield from self._string_leaves(v)
+        elif isinstance(obj, list):
+            for i, v in enumerate(obj):
+                if isinstance(v, str):
+                    yield obj, i
+                else:
+                    yield from self._string_leaves(v)
+
+    @staticmethod
+    def _truncate(text: str, target: int) -> str:
+        cut = len(text) - target
+        return text[:target] + TRUNCATION_MARKER.format(cut=cut)
+
+    @staticmethod
+    def _dump(payload: dict) -> str:
+        return json.dumps(payload, indent=2)
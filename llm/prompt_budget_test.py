@@ -0,0 +1,68 @@
+import json
+
+from llm.prompt_budget import MIN_FIELD_CHARS, PromptBudget, estimate_tokens
+
+
+def payload_tokens(payload: dict) -> int:
+    return estimate_tokens(json.dumps(payload, indent=2))
+
+
+def test_payload_under_budget_is_unchanged():
+    payload = {"original_query": "ASCII values of INDIA", "completed_steps": [{"result": "x" * 100}]}
+    assert PromptBudget(2000).fit(payload) == payload
+
+
+def test_largest_fields_are_cut_first():
+    payload = {"plan": ["Step 0: fetch", "Step 1: summarize"], "result": "a" * 20_000, "memory": "b" * 2_000}
+    fitted = PromptBudget(2000).fit(payload)
+
+    assert payload_tokens(fitted) <= 2000
+    assert fitted["plan"] == payload["plan"]
+    assert fitted["memory"] == payload["memory"]
+    assert len(fitted["result"]) < len(payload["result"])
+    assert "truncated" in fitted["result"]
+
+
+def test_reserved_tokens_count_against_the_budget():
+    payload = {"result": "a" * 8_000}
+    fitted = PromptBudget(2000).fit(payload, reserved_tokens=1500)
+    assert payload_tokens(fitted) + 1500 <= 2000
+
+
+def test_fields_are_not_cut_below_the_floor():
+    payload = {"completed_steps": [{"result": "x" * 300} for _ in range(100)]}
+    fitted = PromptBudget(2000).fit(payload)
+    assert all(len(step["result"]) >= MIN_FIELD_CHARS for step in fitted["completed_steps"])
+
+
+def test_many_medium_fields_drop_the_oldest_completed_steps():
+    payload = {
+        "original_query": "q",
+        "completed_steps": [{"index": i, "result": "x" * 300} for i in range(100)],
+        "current_step": {"index": 100},
+    }
+    fitted = PromptBudget(2000).fit(payload)
+
+    assert payload_tokens(fitted) <= 2000
+    kept = [step["index"] for step in fitted["completed_steps"]]
+    assert kept and kept == list(range(100 - len(kept), 100))  # newest steps survive, in order
+    assert fitted["current_step"] == {"index": 100}
+
+
+def test_many_memory_excerpts_drop_the_weakest_matches():
+    payload = {
+        "raw_input": "q",
+        "memory_excerpt": {f"memory_{i}": {"solution_summary": "y" * 300} for i in range(1, 101)},
+    }
+    fitted = PromptBudget(2000).fit(payload)
+
+    assert payload_tokens(fitted) <= 2000
+    kept = list(fitted["memory_excerpt"])
+    assert kept == [f"memory_{i}" for i in range(1, len(kept) + 1)]
+
+
+def test_original_payload_is_not_modified():
+    payload = {"completed_steps": [{"result": "x" * 300} for _ in range(100)]}
+    snapshot = json.dumps(payload)
+    PromptBudget(2000).fit(payload)
+    assert json.dumps(payload) == snapshot
@@ -0,0 +1,225 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# ───────────────────────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────────────────────
+
+MAX_ATTEMPTS = 4  # first call + 3 retries
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 8.0  # seconds
+SESSION_RETRY_BUDGET = 8  # retries shared by every LLM call of one agent session
+BREAKER_FAILURE_THRESHOLD = 5  # consecutive failures before the circuit opens
+BREAKER_RESET_TIMEOUT = 30.0  # seconds before a half-open probe is allowed
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20  # don't hedge until we know what "slow" looks like
+HEDGE_POOL_SIZE = 8
+
+
+class LLMUnavailableError(RuntimeError):
+    """The backend kept failing with transient errors and retries are exhausted."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the backend while the circuit breaker is open."""
+
+
+def is_retryable(error: Exception) -> bool:
+    # Imported lazily: only reached once a call has failed, so the SDK is loaded by then
+    from google.genai.errors import ClientError, ServerError
+
+    if isinstance(error, ServerError):
+        return True
+    return isinstance(error, ClientError) and getattr(error, "code", None) == 429
+
+
+# ───────────────────────────────────────────────────────────────
+# RETRY BUDGET (per session)
+# ───────────────────────────────────────────────────────────────
+class RetryBudget:
+    def __init__(self, max_retries: int = SESSION_RETRY_BUDGET):
+        self.max_retries = max_retries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.used >= self.max_retries:
+                return False
+            self.used += 1
+            return True
+
+
+_session_budget: ContextVar[Optional[RetryBudget]] = ContextVar("llm_retry_budget", default=None)
+
+
+@contextmanager
+def retry_budget_scope(max_retries: int = SESSION_RETRY_BUDGET):
+    """Give every LLM call made inside this block (one agent session) a shared retry budget."""
+    budget = RetryBudget(max_retries)
+    token = _session_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _session_budget.reset(token)
+
+
+# ───────────────────────────────────────────────────────────────
+# CIRCUIT BREAKER (per backend)
+# ───────────────────────────────────────────────────────────────
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False  # a half-open probe is in flight
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Closed: always. Open: never. Half-open: only the first caller, as the probe; the rest wait for its outcome."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._probing = False
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                # A failed half-open probe re-opens the circuit for another full timeout
+                self.opened_at = time.monotonic()
+
+
+GEMINI_BREAKER = CircuitBreaker()
+
+
+# ───────────────────────────────────────────────────────────────
+# LATENCY TRACKER (drives hedging)
+# ───────────────────────────────────────────────────────────────
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self.samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_POOL_SIZE, thread_name_prefix="llm-hedge")
+        return _hedge_pool
+
+
+# ───────────────────────────────────────────────────────────────
+# RESILIENT CALLER
+# ───────────────────────────────────────────────────────────────
+class ResilientLLM:
+    """
+    Wrap a blocking LLM call with jittered exponential backoff, the session retry budget,
+    a shared circuit breaker and (optionally) hedged requests past the p95 latency.
+    """
+
+    def __init__(self, label: str, breaker: CircuitBreaker = GEMINI_BREAKER, max_attempts: int = MAX_ATTEMPTS,
+                 hedge: bool = False):
+        self.label = label
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.hedge = hedge
+        self.latency = LatencyTracker()
+
+    def call(self, fn: Callable[[], T]) -> T:
+        attempt = 1
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.label} LLM circuit open; failing fast.")
+
+            try:
+                result = self._call_hedged(fn) if self.hedge else self._call_timed(fn)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record_success()  # the backend answered; the request itself was bad
+                    raise
+                self.breaker.record_failure()
+
+                budget = _session_budget.get()
+                if attempt >= self.max_attempts or (budget is not None and not budget.try_spend()):
+                    raise LLMUnavailableError(f"{self.label} LLM unavailable after {attempt} attempt(s): {e}") from e
+                delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+                print(f"🔁 {self.label} LLM error ({e}); retry {attempt}/{self.max_attempts - 1} in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _call_timed(self, fn: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        result = fn()
+        self.latency.record(time.perf_counter() - start)
+        return result
+
+    def _call_hedged(self, fn: Callable[[], T]) -> T:
+        threshold = self.latency.percentile(HEDGE_PERCENTILE)
+        if threshold is None:
+            return self._call_timed(fn)
+
+        pool = _get_hedge_pool()
+        pending = {pool.submit(self._call_timed, fn)}
+        done, pending = wait(pending, timeout=threshold)
+        budget = _session_budget.get()
+        # a hedge is an extra request: it costs a retry, and never goes to a backend that is recovering
+        if not done and self.breaker.state == "closed" and (budget is None or budget.try_spend()):
+            print(f"⏱️ {self.label} LLM slower than p95 ({threshold:.2f}s); sending hedged request.")
+            pending.add(pool.submit(self._call_timed, fn))
+
+        error: Optional[Exception] = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
@@ -0,0 +1,177 @@
+import threading
+import time
+
+import pytest
+from google.genai.errors import ClientError, ServerError
+
+import llm.resilience as resilience
+from llm.resilience import (CircuitBreaker, CircuitOpenError, LLMUnavailableError, ResilientLLM, RetryBudget,
+                            retry_budget_scope)
+
+
+def server_error() -> ServerError:
+    return ServerError(503, {"error": {"message": "overloaded", "status": "UNAVAILABLE"}})
+
+
+class Flaky:
+    """Fails with `errors` in order, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: 0.0)
+
+
+# ── Circuit breaker ─────────────────────────────────────────
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_half_open_breaker_admits_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+
+    admitted = []
+    callers = [threading.Thread(target=lambda: admitted.append(breaker.allow())) for _ in range(8)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    assert admitted.count(True) == 1
+
+
+def test_successful_probe_closes_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_for_a_full_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+# ── Retry budget ────────────────────────────────────────────
+def test_retry_budget_is_spent_once_per_retry():
+    budget = RetryBudget(max_retries=2)
+    assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+    assert budget.used == 2
+
+
+def test_retries_until_success():
+    fn = Flaky(server_error(), server_error())
+    llm = ResilientLLM("Test", breaker=CircuitBreaker())
+    assert llm.call(fn) == "ok"
+    assert fn.calls == 3
+
+
+def test_gives_up_after_max_attempts():
+    fn = Flaky(*[server_error() for _ in range(10)])
+    llm = ResilientLLM("Test", breaker=CircuitBreaker(failure_threshold=100), max_attempts=3)
+    with pytest.raises(LLMUnavailableError):
+        llm.call(fn)
+    assert fn.calls == 3
+
+
+def test_session_budget_caps_retries_across_calls():
+    llm = ResilientLLM("Test", breaker=CircuitBreaker(failure_threshold=100), max_attempts=4)
+    with retry_budget_scope(max_retries=2) as budget:
+        assert llm.call(Flaky(server_error(), server_error())) == "ok"
+        fn = Flaky(server_error())
+        with pytest.raises(LLMUnavailableError):
+            llm.call(fn)
+    assert budget.used == 2
+    assert fn.calls == 1
+
+
+def test_non_retryable_errors_are_raised_and_keep_the_breaker_closed():
+    breaker = CircuitBreaker(failure_threshold=1)
+    fn = Flaky(ClientError(400, {"error": {"message": "bad request", "status": "INVALID_ARGUMENT"}}))
+    with pytest.raises(ClientError):
+        ResilientLLM("Test", breaker=breaker).call(fn)
+    assert fn.calls == 1
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_fails_fast_without_calling():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    fn = Flaky()
+    with pytest.raises(CircuitOpenError):
+        ResilientLLM("Test", breaker=breaker).call(fn)
+    assert fn.calls == 0
+
+
+# ── Hedging ─────────────────────────────────────────────────
+def slow_first_call(delay: float):
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        if first:
+            time.sleep(delay)
+            return "slow"
+        return "fast"
+
+    return fn, calls
+
+
+def warmed_up_llm(breaker: CircuitBreaker) -> ResilientLLM:
+    llm = ResilientLLM("Test", breaker=breaker, hedge=True)
+    for _ in range(resilience.HEDGE_MIN_SAMPLES):
+        llm.latency.record(0.01)
+    return llm
+
+
+def test_hedge_is_sent_past_p95_and_charged_to_the_budget():
+    llm = warmed_up_llm(CircuitBreaker())
+    fn, calls = slow_first_call(0.5)
+    with retry_budget_scope(max_retries=1) as budget:
+        assert llm.call(fn) == "fast"
+    assert len(calls) == 2
+    assert budget.used == 1
+
+
+def test_no_hedge_once_the_budget_is_spent():
+    llm = warmed_up_llm(CircuitBreaker())
+    fn, calls = slow_first_call(0.1)
+    with retry_budget_scope(max_retries=0):
+        assert llm.call(fn) == "slow"
+    assert len(calls) == 1
+
+
+def test_no_hedge_while_the_breaker_is_recovering():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    llm = warmed_up_llm(breaker)
+    fn, calls = slow_first_call(0.1)
+    assert llm.call(fn) == "slow"
+    assert len(calls) == 1
@@ -0,0 +1,126 @@
+import json
+from typing import Iterable, Optional
+
+JSON_FENCE = "```json"
+FENCE = "```"
+
+
+class JsonBlockParser:
+    """
+    Incrementally scan streamed model text for the first ```json fenced object.
+
+    `feed` returns True as soon as the object's closing brace arrives (string- and
+    escape-aware), so callers can stop reading and ignore any trailing prose.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.block_start: Optional[int] = None  # index of the opening "{"
+        self.block_end: Optional[int] = None  # index just past the closing "}"
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        return self.block_end is not None
+
+    def feed(self, chunk: Optional[str]) -> bool:
+        if self.complete or not chunk:
+            return self.complete
+        self.text += chunk
+
+        if self.block_start is None:
+            fence = self.text.find(JSON_FENCE)
+            if fence == -1:
+                return False
+            brace = self.text.find("{", fence + len(JSON_FENCE))
+            if brace == -1:
+                return False
+            self.block_start = self._pos = brace
+
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.block_end = i + 1
+                    return True
+        self._pos = len(text)
+        return False
+
+    @property
+    def block(self) -> Optional[str]:
+        """The JSON object text; falls back to whatever sits inside the fence if it never balanced."""
+        if self.complete:
+            return self.text[self.block_start:self.block_end]
+        if self.block_start is None:
+            return None
+        closing = self.text.find(FENCE, self.block_start)
+        return self.text[self.block_start:closing if closing != -1 else None].strip()
+
+    def parse(self) -> dict:
+        block = self.block
+        if block is None:
+            raise ValueError("No JSON block found")
+        try:
+            return json.loads(block)
+        except json.JSONDecodeError:
+            # Models often put raw newlines/tabs inside string values
+            return json.loads(block, strict=False)
+
+    def salvage_string(self, key: str) -> Optional[str]:
+        """Recover one string field from a block that is not valid JSON as a whole."""
+        block = self.block or ""
+        marker = block.find(f'"{key}"')
+        if marker == -1:
+            return None
+        colon = block.find(":", marker + len(key) + 2)
+        quote = block.find('"', colon + 1) if colon != -1 else -1
+        if quote == -1 or block[colon + 1:quote].strip():
+            return None
+
+        # Walk to the closing quote, honouring escapes
+        i, escape = quote + 1, False
+        while i < len(block):
+            if escape:
+                escape = False
+            elif block[i] == "\\":
+                escape = True
+            elif block[i] == '"':
+                break
+            i += 1
+        try:
+            return json.loads(block[quote:i + 1], strict=False)
+        except json.JSONDecodeError:
+            return block[quote + 1:i].replace('\\"', '"').replace("\\n", "\n")
+
+
+def read_json_stream(chunks: Iterable) -> JsonBlockParser:
+    """
+    Consume a generate_content_stream iterator until the ```json block is complete,
+    then close the stream instead of waiting for the rest of the response.
+    """
+    parser = JsonBlockParser()
+    try:
+        for chunk in chunks:
+            if parser.feed(getattr(chunk, "text", None)):
+                break
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+    return parser
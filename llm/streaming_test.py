@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pytest
+
+from llm.streaming import JsonBlockParser, read_json_stream
+
+
+def feed_all(parser: JsonBlockParser, chunks: list[str]) -> list[bool]:
+    return [parser.feed(chunk) for chunk in chunks]
+
+
+def test_completes_on_the_closing_brace():
+    parser = JsonBlockParser()
+    assert feed_all(parser, ['Sure!\n```js', 'on\n{"a": 1, "b": {"c"', ': [1, 2]}', '}\n```\ntrailing prose']) == \
+           [False, False, False, True]
+    assert parser.parse() == {"a": 1, "b": {"c": [1, 2]}}
+
+
+def test_text_before_the_fence_is_ignored():
+    parser = JsonBlockParser()
+    parser.feed('Thinking {not json} here.\n```json\n{"ok": true}\n```')
+    assert parser.parse() == {"ok": True}
+
+
+def test_braces_and_escaped_quotes_inside_strings_do_not_close_the_block():
+    parser = JsonBlockParser()
+    assert not parser.feed('```json\n{"code": "if x: {\\"y\\": \'}\'}", ')
+    assert parser.feed('"n": 1}')
+    assert parser.parse() == {"code": "if x: {\"y\": '}'}", "n": 1}
+
+
+def test_escape_split_across_chunks():
+    parser = JsonBlockParser()
+    assert feed_all(parser, ['```json\n{"s": "a\\', '"}', '"}']) == [False, False, True]
+    assert parser.parse() == {"s": 'a"}'}
+
+
+def test_feed_after_completion_is_a_no_op():
+    parser = JsonBlockParser()
+    parser.feed('```json\n{"a": 1}\n```')
+    assert parser.feed('```json\n{"a": 2}```')
+    assert parser.parse() == {"a": 1}
+
+
+def test_raw_newlines_inside_strings_are_tolerated():
+    parser = JsonBlockParser()
+    parser.feed('```json\n{"summary": "line one\nline two"}\n```')
+    assert parser.parse() == {"summary": "line one\nline two"}
+
+
+def test_unbalanced_block_falls_back_to_the_fence_contents():
+    parser = JsonBlockParser()
+    parser.feed('```json\n{"a": 1, "b": "unterminated}\n```\n')
+    assert not parser.complete
+    assert parser.block == '{"a": 1, "b": "unterminated}'
+
+
+def test_missing_block_raises():
+    parser = JsonBlockParser()
+    parser.feed("no fenced json here")
+    with pytest.raises(ValueError):
+        parser.parse()
+
+
+def test_salvage_string_from_invalid_json():
+    parser = JsonBlockParser()
+    parser.feed('```json\n{"solution_summary": "He said \\"hi\\"", "confidence": oops}\n```')
+    with pytest.raises(ValueError):
+        parser.parse()
+    assert parser.salvage_string("solution_summary") == 'He said "hi"'
+    assert parser.salvage_string("missing") is None
+
+
+class Stream:
+    def __init__(self, texts):
+        self.texts = texts
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for text in self.texts:
+            self.read += 1
+            yield SimpleNamespace(text=text)
+
+    def close(self):
+        self.closed = True
+
+
+def test_read_json_stream_stops_and_closes_after_the_block():
+    stream = Stream(['```json\n{"a"', ': 1}', '\n```', "more", "and more"])
+    parser = read_json_stream(stream)
+    assert parser.parse() == {"a": 1}
+    assert stream.read == 2
+    assert stream.closed
+
+
+def test_read_json_stream_skips_chunks_without_text():
+    stream = Stream([None, '```json\n{"a": 1}'])
+    assert read_json_stream(stream).parse() == {"a": 1}
@@ -1,11 +1,13 @@
+import argparse
 import asyncio
 import sys
 import signal
 import os
-import yaml
 
-from agent.agent_loop2 import AgentLoop
-from mcp_servers.multiMCP import MultiMCP
+from agent.metrics import start_metrics
+from agent.profiling import DEFAULT_PROFILE_DIR, SessionProfiler
+from agent.runtime import build_agent_loop, start_multi_mcp
+from agent.tracing import enable_tracing_from_env
 
 
 def handle_signal(signum, frame):
@@ -17,22 +19,20 @@ for sig in (signal.SIGINT, signal.SIGTERM):
     signal.signal(sig, handle_signal)
 
 
-async def main():
+async def main(args):
     print("Hello World!")
+    enable_tracing_from_env()
+    stop_metrics_dump = start_metrics(args.metrics_port, args.metrics_file)
     print("Loading MCP Server...")
-    with open("config/mcp_server_config.yaml", 'r') as f:
-        mcp_server_config = yaml.safe_load(f)
-        mcp_servers_config_dict = mcp_server_config.get("mcp_servers", [])
+    multi_mcp = await start_multi_mcp()
+    loop = build_agent_loop(multi_mcp, strategy="exploratory")
+    profiler = SessionProfiler(args.profile) if args.profile else None
+    if profiler:
+        loop = profiler.wrap(loop)
 
-    multi_mcp = MultiMCP(mcp_server_configs=mcp_servers_config_dict)
-    await multi_mcp.initialize()
-
-    loop = AgentLoop(
-        perception_prompt_path="prompts/perception_prompt.txt",
-        decision_prompt_path="prompts/decision_prompt.txt",
-        multi_mcp=multi_mcp,
-        strategy="exploratory"
-    )
+    if args.resume:
+        response = await loop.resume(args.resume)
+        print(f"🔵 Agent: {response.state['solution_summary']}\n")
 
     while True:
         query = input("🟢  You: ").strip()
@@ -48,6 +48,22 @@ async def main():
             print("👋  Goodbye!")
             break
 
+    if profiler:
+        profiler.close()
+    if stop_metrics_dump:
+        stop_metrics_dump()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Interactive agent REPL.")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help=f"profile each query into DIR (default: {DEFAULT_PROFILE_DIR})")
+    parser.add_argument("--resume", metavar="SESSION_ID",
+                        help="finish an interrupted session from the session store before starting the REPL")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port")
+    parser.add_argument("--metrics-file", help="periodically dump Prometheus metrics to this file")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_args()))
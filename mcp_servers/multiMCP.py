@@ -2,10 +2,13 @@ import ast
 import json
 import os
 import sys
+import time
 import traceback
 from typing import List, Dict, Any
 from mcp import StdioServerParameters, stdio_client, ClientSession
 
+from agent.metrics import TOOL_CALLS, TOOL_SECONDS
+
 
 class MultiMCP:
     def __init__(self, mcp_server_configs: List[dict]):
@@ -147,10 +150,18 @@ class MultiMCP:
             cwd=config.get("cwd", os.getcwd())
         )
 
-        async with stdio_client(params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                return await session.call_tool(tool_name, arguments)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            async with stdio_client(params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    result = await session.call_tool(tool_name, arguments)
+            outcome = "error" if getattr(result, "isError", False) else "ok"
+            return result
+        finally:
+            TOOL_CALLS.inc(tool=tool_name, outcome=outcome)
+            TOOL_SECONDS.observe(time.perf_counter() - start, tool=tool_name)
 
     async def shutdown(self):
         pass
@@ -0,0 +1,151 @@
+import ast
+import builtins
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+ANSWER_CACHE_PATH = "memory/answer_cache.json"
+MAX_ENTRIES = 5000
+COMPACT_AFTER = 500  # journal records appended before the snapshot is rewritten
+
+# Freshness per tool (seconds). An answer lives as long as its most volatile tool allows.
+TOOL_FRESHNESS = {
+    "duckduckgo_search_results": 15 * 60,
+    "download_raw_html_from_url": 15 * 60,
+    "convert_webpage_url_into_markdown": 30 * 60,
+    "search_stored_documents_rag": 6 * 3600,
+    "extract_pdf": 6 * 3600,
+}
+DEFAULT_TOOL_TTL = 7 * 24 * 3600  # deterministic tools: math, string/int conversions, ...
+NO_TOOL_TTL = 3600  # answered by the LLM alone; may be time sensitive
+
+
+def normalize_query(query: str) -> str:
+    """Whitespace-collapsed query. Case and punctuation are kept: "INDIA" and "india" may need different answers."""
+    return " ".join(query.split())
+
+
+def tools_used(session) -> set[str]:
+    """Tool names called by the completed CODE steps of a session (builtins excluded)."""
+    names = set()
+    for version in session.plan_versions:
+        for step in version["steps"]:
+            if step.type != "CODE" or step.status != "completed" or not step.code:
+                continue
+            try:
+                tree = ast.parse(step.code.tool_arguments["code"])
+            except SyntaxError:
+                continue
+            names.update(
+                node.func.id for node in ast.walk(tree)
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not hasattr(builtins, node.func.id)
+            )
+            # parallel(("tool", arg), ...) names its tools as strings
+            names.update(
+                node.value for node in ast.walk(tree)
+                if isinstance(node, ast.Constant) and node.value in TOOL_FRESHNESS
+            )
+    return names
+
+
+class AnswerCache:
+    """
+    Exact-hit cache of final answers keyed on the normalized query, kept in memory and on disk.
+    New answers are appended to a journal next to the JSON snapshot, which is only rewritten
+    every COMPACT_AFTER records.
+    """
+
+    def __init__(self, path: str = ANSWER_CACHE_PATH):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix(".journal.jsonl")
+        self._journal_records = 0
+        self.entries: dict[str, dict] = self._load()
+
+    def lookup(self, query: str) -> Optional[dict]:
+        key = normalize_query(query)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= time.time():
+            del self.entries[key]
+            return None
+        return entry
+
+    def ttl_for(self, tools: set[str]) -> int:
+        if not tools:
+            return NO_TOOL_TTL
+        return min(TOOL_FRESHNESS.get(tool, DEFAULT_TOOL_TTL) for tool in tools)
+
+    def record(self, session) -> bool:
+        if not session.state.get("original_goal_achieved") or session.state.get("cached"):
+            return False
+
+        tools = tools_used(session)
+        ttl = self.ttl_for(tools)
+        now = time.time()
+        entry = {
+            "query": session.original_query,
+            "state": {k: v for k, v in session.state.items() if k not in {"cached", "cache"}},
+            "session_id": session.session_id,
+            "tools": sorted(tools),
+            "created_at": now,
+            "expires_at": now + ttl
+        }
+        self.entries[normalize_query(session.original_query)] = entry
+        self._evict(now)
+        self._append(entry)
+        print(f"💾 Answer cached for {ttl // 60} min (tools: {', '.join(sorted(tools)) or 'none'}).")
+        return True
+
+    def _evict(self, now: float):
+        for key in [k for k, e in self.entries.items() if e["expires_at"] <= now]:
+            del self.entries[key]
+        if len(self.entries) > MAX_ENTRIES:
+            oldest = sorted(self.entries, key=lambda k: self.entries[k]["created_at"])
+            for key in oldest[:len(self.entries) - MAX_ENTRIES]:
+                del self.entries[key]
+
+    # ── Persistence ─────────────────────────────────────────
+    def _load(self) -> dict[str, dict]:
+        entries = []
+        if self.path.exists():
+            try:
+                entries.extend(json.loads(self.path.read_text(encoding="utf-8")).values())
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"⚠️ Answer cache unreadable ({e}); starting empty.")
+        torn = False
+        if self.journal_path.exists():
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        torn = True  # last line cut short by a crash
+                        break
+                    self._journal_records += 1
+        now = time.time()
+        # re-keyed from the stored query, so files written with an older normalization still match exactly
+        self.entries = {normalize_query(e["query"]): e for e in entries if e["expires_at"] > now}
+        self._evict(now)
+        if torn:
+            self._save()  # appending after a torn line would corrupt the next record too
+        return self.entries
+
+    def _append(self, entry: dict):
+        if self._journal_records >= COMPACT_AFTER:
+            self._save()
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+        self._journal_records += 1
+
+    def _save(self):
+        """Rewrite the snapshot from memory and start a new journal."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.entries, separators=(",", ":"), default=str), encoding="utf-8")
+        tmp_path.replace(self.path)
+        self.journal_path.unlink(missing_ok=True)  # a crash before this only replays entries the snapshot has
+        self._journal_records = 0
@@ -0,0 +1,73 @@
+"""
+Batch fuzzy scoring for MemorySearch: pre-lowercased columns, `rapidfuzz.process.cdist` with
+worker threads, NumPy weighting and argpartition top-k. Imported lazily (numpy is not needed
+until the first memory search).
+"""
+from typing import Dict, List
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+PARALLEL_MIN_ENTRIES = 20_000  # below this, cdist worker threads cost more than they save
+PRUNE_SEED = 64  # best-bound entries scored exactly first, to set the pruning threshold
+
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, via argpartition instead of a full sort.
+    Ties keep entry order, exactly like a stable `sorted(..., reverse=True)`.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = scores[np.argpartition(scores, n - k)[n - k]]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    top = np.concatenate([above, ties])
+    return top[np.lexsort((top, -scores[top]))]
+
+
+class ScoringTable:
+    """Memory entries with pre-lowercased query/summary columns for batch fuzzy scoring."""
+
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+        self.queries = [e["query"].lower() for e in entries]
+        self.summaries = [e["solution_summary"].lower() for e in entries]
+        self.length_penalty = np.fromiter((len(e["solution_summary"]) for e in entries),
+                                          dtype=np.float64, count=len(entries)) / 100
+
+    def _partial_ratio(self, query: str, choices: list[str]) -> np.ndarray:
+        workers = -1 if len(choices) >= PARALLEL_MIN_ENTRIES else 1
+        return process.cdist([query], choices, scorer=fuzz.partial_ratio, dtype=np.float64, workers=workers)[0]
+
+    def scores(self, user_query: str) -> np.ndarray:
+        query = user_query.lower()
+        return (0.5 * self._partial_ratio(query, self.queries) + 0.4 * self._partial_ratio(query, self.summaries)
+                - 0.05 * self.length_penalty)
+
+    def top(self, user_query: str, top_k: int) -> List[Dict]:
+        """
+        Same result as ranking `scores()`, but summaries (the long, expensive side) are only scored
+        for entries whose query score leaves them a chance: a summary adds at most 0.4 * 100, so
+        anything whose bound is below the k-th best exact score found so far cannot make the top k.
+        """
+        if not self.entries or top_k <= 0:
+            return []
+        query = user_query.lower()
+        query_scores = self._partial_ratio(query, self.queries)
+        bound = 0.5 * query_scores + 40.0 - 0.05 * self.length_penalty
+
+        scores = np.full(len(self.entries), -np.inf)
+        seed = top_indices(bound, max(PRUNE_SEED, 8 * top_k))
+        self._score_summaries(query, query_scores, seed, scores)
+        kth = np.sort(scores[seed])[::-1][min(top_k, len(seed)) - 1]
+        rest = np.flatnonzero((bound >= kth) & np.isneginf(scores))
+        self._score_summaries(query, query_scores, rest, scores)
+        return [self.entries[i] for i in top_indices(scores, top_k)]
+
+    def _score_summaries(self, query: str, query_scores: np.ndarray, rows: np.ndarray, scores: np.ndarray):
+        if len(rows):
+            summary_scores = self._partial_ratio(query, [self.summaries[i] for i in rows])
+            scores[rows] = 0.5 * query_scores[rows] + 0.4 * summary_scores - 0.05 * self.length_penalty[rows]
@@ -1,60 +1,424 @@
 import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-from rapidfuzz import fuzz
+from memory.session_archive import ARCHIVE_SUFFIX, read_archive
+from memory.session_store import FTS_CANDIDATES, FTS_PREFILTER_MIN, SQLiteSessionStore, get_session_store
+
+MEMORY_INDEX_NAME = ".memory_index.jsonl"
+FULL_RESCAN_INTERVAL = 300.0  # seconds; also catches in-place edits that leave directory mtimes alone
+MEMORY_MODE_ENV = "AGENT_MEMORY_MODE"
+MEMORY_MODES = ("fuzzy", "semantic", "hybrid")
+HYBRID_CANDIDATES = 50  # semantic neighbours re-ranked with the fuzzy score in hybrid mode
+HYBRID_SEMANTIC_WEIGHT = 0.6
+SEMANTIC_RETRY_AFTER = 60.0  # seconds of fuzzy-only search after the embedding server failed
+MAX_SCORE = 90.0  # 0.5 * 100 (query) + 0.4 * 100 (summary): the fuzzy score's upper bound
+EARLY_STOP_SCORE = 70.0  # partition walk stops once top_k candidates score at least this
+MAX_AGE_DAYS_ENV = "AGENT_MEMORY_MAX_AGE_DAYS"
+MAX_PARTITIONS_ENV = "AGENT_MEMORY_MAX_PARTITIONS"
+RECENCY_HALF_LIFE_ENV = "AGENT_MEMORY_HALF_LIFE_DAYS"
+DEFAULT_MAX_AGE_DAYS = 90  # the recency window unless the env or the caller says otherwise ("none" lifts it)
+EXTRACTOR_VERSION = 3  # bump when extraction changes: index records from other versions are re-extracted
+
+
+def is_agent_session(obj) -> bool:
+    return isinstance(obj, dict) and isinstance(obj.get("original_query"), str) and "plan_versions" in obj
+
+
+def extract_session_entry(session: dict, file_name: str) -> Optional[Dict]:
+    """
+    Memory entry of an `AgentSession.to_json` dict, read from its known fields: the first
+    perception that marked the goal achieved (session-level, then steps in plan order), else
+    the final state (absent from older logs). None if the goal was never achieved, or if the
+    answer came from the answer cache (the session that produced it is indexed already).
+    """
+    if (session.get("state") or {}).get("cached"):
+        return None
+    perceptions = [session.get("perception")]
+    perceptions.extend(step.get("perception") for version in session.get("plan_versions") or ()
+                       for step in version.get("steps") or ())
+    match = next((p for p in perceptions if p and p.get("original_goal_achieved") is True), None)
+    if match is None:
+        match = session.get("state")
+        if not match or match.get("original_goal_achieved") is not True:
+            return None
+    query = session["original_query"] or (session.get("state_snapshot") or {}).get("query", "")
+    if not query:
+        return None
+    return {
+        "file": file_name,
+        "query": query,
+        "result_requirement": match.get("result_requirement", ""),
+        "solution_summary": match.get("solution_summary", "")
+    }
+
+
+def env_limit(name: str, default, cast):
+    """Numeric setting from the environment: unset → `default`, "" / "none" / "off" → None (unbounded)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ("", "none", "off"):
+        return None
+    return cast(value)
+
+
+def partition_day(rel: str) -> Optional[date]:
+    """Day of a YYYY/MM/DD/<id>.json session or YYYY/MM/DD.jsonl.gz archive path; None for other layouts."""
+    parts = Path(rel).parts
+    if len(parts) == 4:
+        year, month, day = parts[:3]
+    elif len(parts) == 3 and parts[2].endswith(ARCHIVE_SUFFIX):
+        year, month, day = parts[0], parts[1], parts[2][:-len(ARCHIVE_SUFFIX)]
+    else:
+        return None
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+class MemoryIndex:
+    """
+    Memory entries extracted per session file (or archive), keyed by path relative to the logs
+    directory and tagged with the file's mtime/size. Persisted as an append-only JSONL inside the
+    logs directory, so a new process starts warm.
+
+    `refresh()` re-lists only directories whose mtime changed (the session writer replaces files
+    by rename, which bumps the directory) and only parses new or changed files.
+    """
+
+    def __init__(self, logs_path: Path, extract_file):
+        self.logs_path = logs_path
+        self.path = logs_path / MEMORY_INDEX_NAME
+        self.extract_file = extract_file  # Path → list of entries
+        self.files: dict[str, dict] = {}  # relative path → {"mtime", "size", "entries"}
+        self._dirs: dict[str, tuple[int, list[str], list[str]]] = {}  # dir → (mtime_ns, subdirs, indexed files)
+        self._entries: Optional[List[Dict]] = None
+        self._table = None  # ScoringTable over `_entries`
+        self._day_tables: Optional[dict] = None  # day partition → ScoringTable over its entries
+        self._dirty_days: set = set()
+        self._records_on_disk = 0
+        self._last_full_scan = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self._loaded = True
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:  # torn last line from a crash
+                    break
+                self._records_on_disk += 1
+                if record.get("deleted") or record.get("extractor") != EXTRACTOR_VERSION:
+                    self.files.pop(record["path"], None)  # older extractor: parsed again on the next scan
+                else:
+                    self.files[record["path"]] = record
+
+    def refresh(self) -> List[Dict]:
+        """Bring the index up to date with the logs directory and return all entries."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            full = time.monotonic() - self._last_full_scan > FULL_RESCAN_INTERVAL
+            found, changed = set(), []
+            self._scan(self.logs_path, full, found, changed)
+            if full:
+                self._last_full_scan = time.monotonic()
+
+            records = [{"path": rel, "deleted": True} for rel in set(self.files) - found]
+            for rel, path, stat in changed:
+                records.append({"path": rel, "mtime": stat.st_mtime_ns, "size": stat.st_size,
+                                "extractor": EXTRACTOR_VERSION, "entries": self.extract_file(path)})
+            if records:
+                for record in records:
+                    if record.get("deleted"):
+                        self.files.pop(record["path"], None)
+                    else:
+                        self.files[record["path"]] = record
+                self._persist(records)
+                self._entries = self._table = None
+                self._dirty_days.update(partition_day(record["path"]) for record in records)
+                print(f"🔍 Memory index: {len(changed)} new/changed, {len(records) - len(changed)} removed file(s)")
+
+            if self._entries is None:
+                self._entries = [entry for record in self.files.values() for entry in record["entries"]]
+            return self._entries
+
+    def scoring_table(self):
+        """Refresh, then the cached ScoringTable (rebuilt only when entries changed)."""
+        from memory.memory_scoring import ScoringTable  # numpy: imported on first search, not at startup
+
+        entries = self.refresh()
+        with self._lock:
+            if self._table is None or self._table.entries is not entries:
+                self._table = ScoringTable(entries)
+            return self._table
+
+    def partitions(self) -> list[tuple[Optional[date], object]]:
+        """Refresh, then (day, ScoringTable) per date partition, newest first, undated files last."""
+        from memory.memory_scoring import ScoringTable
+
+        self.refresh()
+        with self._lock:
+            if self._day_tables is None or self._dirty_days:
+                rebuild = None if self._day_tables is None else self._dirty_days
+                days = defaultdict(list)
+                for rel, record in self.files.items():
+                    day = partition_day(rel)
+                    if rebuild is None or day in rebuild:
+                        days[day].extend(record["entries"])
+                tables = {} if rebuild is None else {d: t for d, t in self._day_tables.items() if d not in rebuild}
+                tables.update((day, ScoringTable(entries)) for day, entries in days.items() if entries)
+                self._day_tables, self._dirty_days = tables, set()
+            return sorted(self._day_tables.items(),
+                          key=lambda item: (item[0] is None, -item[0].toordinal() if item[0] else 0))
+
+    def _scan(self, directory: Path, full: bool, found: set, changed: list):
+        try:
+            mtime = directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        cached = self._dirs.get(str(directory))
+        if cached and cached[0] == mtime and not full:
+            subdirs, files = cached[1], cached[2]
+        else:
+            subdirs, files = [], []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        subdirs.append(entry.path)
+                    elif entry.name.endswith(".json") or entry.name.endswith(ARCHIVE_SUFFIX):
+                        rel = os.path.relpath(entry.path, self.logs_path)
+                        files.append(rel)
+                        stat = entry.stat()
+                        known = self.files.get(rel)
+                        if known is None or known["mtime"] != stat.st_mtime_ns or known["size"] != stat.st_size:
+                            changed.append((rel, Path(entry.path), stat))
+            self._dirs[str(directory)] = (mtime, subdirs, files)
+        found.update(files)
+        for subdir in subdirs:
+            self._scan(Path(subdir), full, found, changed)
+
+    def _persist(self, records: list[dict]):
+        """Append the changes; rewrite the file once superseded records dominate it."""
+        try:
+            if self._records_on_disk + len(records) > 2 * len(self.files) + 1000:
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in self.files.values())
+                tmp_path.replace(self.path)
+                self._records_on_disk = len(self.files)
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+                self._records_on_disk += len(records)
+        except OSError as e:
+            print(f"⚠️ Could not persist memory index {self.path}: {e}")
 
 
 class MemorySearch:
-    def __init__(self, logs_path: str = "memory/session_logs"):
+    """
+    Past solved sessions most similar to a query. `max_age_days`, `max_partitions` (YYYY/MM/DD
+    day partitions, newest first) and `recency_half_life` (days for a match's score to halve)
+    bound and weight the search; set them here as defaults or per `search_memory` call. Unset,
+    they come from AGENT_MEMORY_MAX_AGE_DAYS (DEFAULT_MAX_AGE_DAYS), AGENT_MEMORY_MAX_PARTITIONS
+    and AGENT_MEMORY_HALF_LIFE_DAYS. The SQLite store applies the window in its query but no
+    recency weighting.
+    """
+
+    def __init__(self, logs_path: str = "memory/session_logs", store: Optional[SQLiteSessionStore] = None,
+                 mode: Optional[str] = None, embed=None, max_age_days: Optional[int] = None,
+                 max_partitions: Optional[int] = None, recency_half_life: Optional[float] = None):
         self.logs_path = Path(logs_path)
+        self.store = store if store is not None else get_session_store()
+        self.index = MemoryIndex(self.logs_path, self._entries_from_file) if self.store is None else None
+        self.mode = mode or os.getenv(MEMORY_MODE_ENV, "fuzzy")
+        if self.mode not in MEMORY_MODES:
+            raise ValueError(f"Unknown memory search mode '{self.mode}' (expected one of {', '.join(MEMORY_MODES)})")
+        self.embed = embed  # text → vector; defaults to the Ollama embedding model
+        self.semantic = None  # SemanticMemory, created on the first semantic/hybrid search
+        self._semantic_lock = threading.Lock()
+        self._semantic_failed_at = None
+        self.max_age_days = max_age_days if max_age_days is not None else env_limit(MAX_AGE_DAYS_ENV, DEFAULT_MAX_AGE_DAYS, int)
+        self.max_partitions = max_partitions if max_partitions is not None else env_limit(MAX_PARTITIONS_ENV, None, int)
+        self.recency_half_life = (recency_half_life if recency_half_life is not None
+                                  else env_limit(RECENCY_HALF_LIFE_ENV, None, float))
+
+    def search_memory(self, user_query: str, top_k: int = 3, max_age_days: Optional[int] = None,
+                      max_partitions: Optional[int] = None, recency_half_life: Optional[float] = None) -> List[Dict]:
+        from memory.memory_scoring import ScoringTable
 
-    def search_memory(self, user_query: str, top_k: int = 3) -> List[Dict]:
-        memory_entries = self._load_queries()
-        scored_results = []
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        max_partitions = self.max_partitions if max_partitions is None else max_partitions
+        recency_half_life = self.recency_half_life if recency_half_life is None else recency_half_life
+        semantic = self.mode != "fuzzy" and (self._semantic_failed_at is None
+                                             or time.monotonic() - self._semantic_failed_at > SEMANTIC_RETRY_AFTER)
 
-        for entry in memory_entries:
-            query_score = fuzz.partial_ratio(user_query.lower(), entry["query"].lower())
-            summary_score = fuzz.partial_ratio(user_query.lower(), entry["solution_summary"].lower())
-            length_penalty = len(entry["solution_summary"]) / 100
-            score = 0.5 * query_score + 0.4 * summary_score - 0.05 * length_penalty
-            scored_results.append((score, entry))
+        weights = None
+        if self.store is not None:
+            # paraphrases defeat the FTS prefilter: semantic modes rank every solved session
+            since_day = (date.today() - timedelta(days=max_age_days)).isoformat() if max_age_days is not None else None
+            table = ScoringTable(self.store.memory_entries(since_day=since_day, max_days=max_partitions) if semantic
+                                 else self._load_from_store(user_query, since_day, max_partitions))
+        elif max_age_days is None and max_partitions is None and recency_half_life is None:
+            table = self._load_table()
+        elif not semantic:
+            return self._search_partitions(user_query, top_k, max_age_days, max_partitions, recency_half_life)
+        else:
+            table = self._load_table()
+            weights = {id(entry): weight
+                       for _, weight, partition in self._select_partitions(max_age_days, max_partitions, recency_half_life)
+                       for entry in partition.entries}
+        if semantic:
+            results = self._semantic_search(table, user_query, top_k, weights)
+            if results is not None:
+                return results
+        if weights is not None:
+            return self._search_partitions(user_query, top_k, max_age_days, max_partitions, recency_half_life)
+        return table.top(user_query, top_k)
 
-        top_matches = sorted(scored_results, key=lambda x: x[0], reverse=True)[:top_k]
-        return [match[1] for match in top_matches]
+    def _select_partitions(self, max_age_days: Optional[int], max_partitions: Optional[int],
+                           recency_half_life: Optional[float]) -> list[tuple[Optional[date], float, object]]:
+        """(day, recency weight, ScoringTable) of the partitions inside the window, newest first."""
+        if self.index is None or not self.logs_path.exists():
+            return []  # the SQLite store applies the window in its query instead
+        today = date.today()
+        selected = []
+        for day, table in self.index.partitions():
+            if max_partitions is not None and len(selected) >= max_partitions:
+                break
+            age = max((today - day).days, 0) if day else None
+            if max_age_days is not None and (age is None or age > max_age_days):
+                break  # everything after is older (or undated)
+            weight = 0.5 ** (age / recency_half_life) if recency_half_life and age is not None else 1.0
+            selected.append((day, weight, table))
+        return selected
 
-    def _load_queries(self) -> List[Dict]:
+    def _search_partitions(self, user_query: str, top_k: int, max_age_days: Optional[int],
+                           max_partitions: Optional[int], recency_half_life: Optional[float]) -> List[Dict]:
+        """
+        Walk day partitions newest first, keeping the best `top_k` (recency-weighted) matches.
+        Stops once they all score EARLY_STOP_SCORE, or once no older match could still beat them.
+        """
+        from memory.memory_scoring import top_indices
+
+        selected = self._select_partitions(max_age_days, max_partitions, recency_half_life)
+        best: list[tuple[float, int, Dict]] = []  # (score, walk order, entry); order breaks ties toward newer
+        searched = entries = 0
+        for day, weight, table in selected:
+            if len(best) >= top_k and best[-1][0] >= min(EARLY_STOP_SCORE, MAX_SCORE * weight):
+                break
+            scores = table.scores(user_query) * weight
+            best.extend((float(scores[i]), entries + int(i), table.entries[i]) for i in top_indices(scores, top_k))
+            best.sort(key=lambda match: (-match[0], match[1]))
+            del best[top_k:]
+            searched += 1
+            entries += len(table.entries)
+        print(f"📦 Searched {searched} of {len(selected)} partition(s) in the window ({entries} memory entries)\n")
+        return [entry for _, _, entry in best]
+
+    def _semantic_search(self, table, user_query: str, top_k: int,
+                         weights: Optional[dict] = None) -> Optional[List[Dict]]:
+        """
+        Top-k by embedding (or, in hybrid mode, embedding + fuzzy); None if embeddings are unavailable.
+        `weights` (id(entry) → recency weight) restricts the search to those entries and weights them.
+        """
+        import numpy as np
+        from memory.memory_scoring import ScoringTable, top_indices
+
+        try:
+            with self._semantic_lock:
+                if self.semantic is None:
+                    from memory.semantic_memory import SemanticMemory, get_embedding
+
+                    self.logs_path.mkdir(parents=True, exist_ok=True)
+                    self.semantic = SemanticMemory(self.logs_path, self.embed or get_embedding)
+            self.semantic.sync(table.entries)
+            narrow = self.mode == "semantic" and weights is None
+            hits = self.semantic.search(user_query, top_k if narrow else HYBRID_CANDIDATES,
+                                        within=weights.keys() if weights is not None else None)
+        except Exception as e:  # Ollama down, faiss missing, ...
+            print(f"⚠️ Semantic memory unavailable ({e}); falling back to fuzzy matching.")
+            self._semantic_failed_at = time.monotonic()
+            return None
+        self._semantic_failed_at = None
+        if narrow or not hits:
+            return [entry for _, entry in hits]
+
+        # cosine similarity scaled to the fuzzy score's 0-100 range; hybrid re-ranks with the fuzzy score
+        candidates = ScoringTable([entry for _, entry in hits])
+        scores = 100 * np.array([similarity for similarity, _ in hits], dtype=np.float64)
+        if self.mode == "hybrid":
+            scores = HYBRID_SEMANTIC_WEIGHT * scores + (1 - HYBRID_SEMANTIC_WEIGHT) * candidates.scores(user_query)
+        if weights is not None:
+            scores *= np.array([weights[id(entry)] for entry in candidates.entries])
+        return [candidates.entries[i] for i in top_indices(scores, top_k)]
+
+    def _load_from_store(self, user_query: str, since_day: Optional[str] = None,
+                         max_days: Optional[int] = None) -> List[Dict]:
+        """Solved sessions from SQLite; large stores are narrowed to FTS matches first."""
+        if self.store.count(achieved_only=True) > FTS_PREFILTER_MIN:
+            memory_entries = self.store.memory_entries(user_query, FTS_CANDIDATES, since_day, max_days)
+        else:
+            memory_entries = self.store.memory_entries(since_day=since_day, max_days=max_days)
+        print(f"📦 Total usable memory entries collected: {len(memory_entries)} (from {self.store.path})\n")
+        return memory_entries
+
+    def _load_table(self):
+        from memory.memory_scoring import ScoringTable
+
+        if not self.logs_path.exists():
+            return ScoringTable([])
+        table = self.index.scoring_table()
+        print(f"📦 Total usable memory entries collected: {len(table.entries)}\n")
+        return table
+
+    def _entries_from_file(self, file: Path) -> List[Dict]:
         memory_entries = []
-        all_json_files = list(self.logs_path.rglob("*.json"))
-        print(f"🔍 Found {len(all_json_files)} JSON file(s) in '{self.logs_path}'")
-
-        for file in all_json_files:
-            count_before = len(memory_entries)
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    content = json.load(f)
-
-                if isinstance(content, list):  # FORMAT 1
-                    for session in content:
-                        self._extract_entry(session, file.name, memory_entries)
-                elif isinstance(content, dict) and "session_id" in content:  # FORMAT 2
-                    self._extract_entry(content, file.name, memory_entries)
-                elif isinstance(content, dict) and "turns" in content:  # FORMAT 3
-                    for turn in content["turns"]:
-                        self._extract_entry(turn, file.name, memory_entries)
-
-            except Exception as e:
-                print(f"⚠️ Skipping '{file}': {e}")
-                continue
-
-            count_after = len(memory_entries)
-            if count_after > count_before:
-                print(f"✅ {file.name}: {count_after - count_before} matching entries")
-
-        print(f"📦 Total usable memory entries collected: {len(memory_entries)}\n")
+        try:
+            if file.name.endswith(ARCHIVE_SUFFIX):
+                for session in read_archive(file):
+                    file_name = f"{file.name}:{session.get('session_id', '?')}"
+                    if is_agent_session(session):
+                        entry = extract_session_entry(session, file_name)
+                        if entry:
+                            memory_entries.append(entry)
+                    else:
+                        self._extract_entry(session, file_name, memory_entries)
+                return memory_entries
+
+            with open(file, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+
+            if is_agent_session(content):  # AgentSession.to_json: read the known fields directly
+                entry = extract_session_entry(content, file.name)
+                if entry:
+                    memory_entries.append(entry)
+            elif isinstance(content, list):  # FORMAT 1
+                for session in content:
+                    self._extract_entry(session, file.name, memory_entries)
+            elif isinstance(content, dict) and "session_id" in content:  # FORMAT 2
+                self._extract_entry(content, file.name, memory_entries)
+            elif isinstance(content, dict) and "turns" in content:  # FORMAT 3
+                for turn in content["turns"]:
+                    self._extract_entry(turn, file.name, memory_entries)
+
+        except Exception as e:
+            print(f"⚠️ Skipping '{file}': {e}")
         return memory_entries
 
     def _extract_entry(self, obj: dict, file_name: str, memory_entries: List[Dict]):
+        """Generic walk for legacy layouts: first dict marking the goal achieved, first "query" string."""
         original_obj = obj  # keep top-level reference
 
         def recursive_find(obj: dict) -> dict | None:
@@ -95,7 +459,6 @@ class MemorySearch:
         try:
             match = recursive_find(obj)
             if match and match["query"]:
-                print(f"✅ Extracted: {match['query'][:40]} → {match['summary'][:40]}")
                 memory_entries.append({
                     "file": file_name,
                     "query": match["query"],
@@ -0,0 +1,193 @@
+import ast
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+PLAN_CACHE_PATH = "memory/plan_cache.json"
+MAX_TEMPLATES = 500
+MAX_CONSECUTIVE_FAILURES = 3  # drop a template that keeps failing
+MIN_STRING_LITERAL_LEN = 2
+MIN_SUMMARY_RESULT_LEN = 4  # shorter results ("2", "") would match unrelated parts of the summary
+
+PARAM_PATTERNS = {
+    "int": r"-?\d+",
+    "float": r"-?\d+(?:\.\d+)?",
+    "str": r".+?",
+}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def is_literal(node) -> bool:
+    return isinstance(node, ast.Constant) and not isinstance(node.value, bool)
+
+
+class PlanCache:
+    """
+    Reuse the winning CODE step of solved sessions for structurally identical queries.
+
+    Literals shared by the query and the code (e.g. "INDIA" in both the question and
+    `strings_to_chars_to_int("INDIA")`) become parameters, so "ASCII values of CHINA ..."
+    matches the same template and runs with the new literal substituted into the code.
+    """
+
+    def __init__(self, path: str = PLAN_CACHE_PATH):
+        self.path = Path(path)
+        self.templates: list[dict] = self._load()
+        self._lock = threading.Lock()  # concurrent sessions record and report on the same cache
+
+    # ── Feeding the cache ───────────────────────────────────
+    def record(self, session) -> bool:
+        """Store a template from a completed session whose goal one CODE step achieved on its own."""
+        if not session.state.get("original_goal_achieved") or session.state.get("plan_cache_hit"):
+            return False
+
+        steps = [s for version in session.plan_versions for s in version["steps"]]
+        code_steps = [s for s in steps if s.type == "CODE"]
+        if len(code_steps) != 1:
+            return False  # later steps embed earlier results, which can't be parameterized
+        step = code_steps[0]
+        result = step.execution_result if isinstance(step.execution_result, dict) else {}
+        if result.get("status") != "success" or not (step.perception and step.perception.original_goal_achieved):
+            return False
+
+        template = self.build_template(session.original_query, step.code.tool_arguments["code"])
+        if template is None:
+            return False
+
+        template.update({
+            "description": step.description,
+            "summary_template": self.build_summary_template(step.perception.solution_summary or "", str(result["result"])),
+            "source_session": session.session_id,
+            "hits": 0,
+            "failures": 0
+        })
+
+        with self._lock:
+            self.templates = [t for t in self.templates if t["query_template"] != template["query_template"]]
+            self.templates.insert(0, template)
+            del self.templates[MAX_TEMPLATES:]
+            self._save()
+        print(f"🧩 Plan cache: stored template '{template['query_template'][:60]}' "
+              f"with {len(template['params'])} parameter(s).")
+        return True
+
+    def build_template(self, query: str, code: str) -> Optional[dict]:
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return None
+
+        query = normalize_query(query)
+        literals = [node.value for node in ast.walk(tree) if is_literal(node)]
+        spans = []  # (start, end, param name)
+        params = []
+        for value in literals:
+            if not isinstance(value, (int, float, str)) or any(p["value"] == value for p in params):
+                continue
+            text = str(value)
+            if isinstance(value, str) and len(text) < MIN_STRING_LITERAL_LEN:
+                continue
+
+            name = f"p{len(params)}"
+            occurrences = [
+                (m.start(), m.end(), name)
+                for m in re.finditer(rf"(?<![\w.]){re.escape(text)}(?!\w|\.\d)", query)
+                if not any(m.start() < end and start < m.end() for start, end, _ in spans)
+            ]
+            if not occurrences:
+                continue
+            if literals.count(value) > 1:
+                return None  # `range(1, 1 + 1)`: rendering can't tell which 1 came from the query
+            spans.extend(occurrences)
+            params.append({"name": name, "type": type(value).__name__, "value": value})
+
+        # Literal text is escaped; the first occurrence of a parameter captures, later ones must repeat it
+        pieces, pos, captured = [], 0, set()
+        kinds = {p["name"]: p["type"] for p in params}
+        for start, end, name in sorted(spans):
+            pieces.append(re.escape(query[pos:start]))
+            pieces.append(f"(?P={name})" if name in captured else f"(?P<{name}>{PARAM_PATTERNS[kinds[name]]})")
+            captured.add(name)
+            pos = end
+        pieces.append(re.escape(query[pos:]))
+
+        return {"query_template": "".join(pieces), "code": code, "params": params}
+
+    @staticmethod
+    def build_summary_template(summary: str, result: str) -> Optional[str]:
+        """The summary with its one copy of the result as "{result}"; None if the result is short or ambiguous."""
+        if len(result.strip()) < MIN_SUMMARY_RESULT_LEN or summary.count(result) != 1 or "{result}" in summary:
+            return None
+        return summary.replace(result, "{result}")
+
+    # ── Using the cache ─────────────────────────────────────
+    def match(self, query: str) -> Optional[tuple[dict, str]]:
+        """Return (template, code with the new literals) for the first template the query fits."""
+        query = normalize_query(query)
+        for template in self.templates:
+            match = re.fullmatch(template["query_template"], query)
+            if not match:
+                continue
+            try:
+                values = {p["name"]: self._cast(p["type"], match.group(p["name"])) for p in template["params"]}
+            except ValueError:
+                continue
+            code = self.render(template, values)
+            if code is not None:
+                return template, code
+        return None
+
+    def render(self, template: dict, values: dict[str, Any]) -> Optional[str]:
+        """Code with each parameter's literal replaced; None if a literal isn't unique (older cache files)."""
+        tree = ast.parse(template["code"])
+        literals = [node.value for node in ast.walk(tree) if is_literal(node)]
+        if any(literals.count(p["value"]) != 1 for p in template["params"]):
+            return None
+        replacements = {p["value"]: values[p["name"]] for p in template["params"]}
+
+        class LiteralSubstituter(ast.NodeTransformer):
+            def visit_Constant(self, node):
+                if is_literal(node) and node.value in replacements:
+                    return ast.copy_location(ast.Constant(value=replacements[node.value]), node)
+                return node
+
+        tree = LiteralSubstituter().visit(tree)
+        return ast.unparse(ast.fix_missing_locations(tree))
+
+    def report(self, template: dict, success: bool):
+        with self._lock:
+            if success:
+                template["hits"] += 1
+                template["failures"] = 0
+            else:
+                template["failures"] += 1
+                # another session may already have dropped it, or record() replaced it
+                if template["failures"] >= MAX_CONSECUTIVE_FAILURES and template in self.templates:
+                    print(f"🧩 Plan cache: dropping template '{template['query_template'][:60]}' after repeated failures.")
+                    self.templates = [t for t in self.templates if t is not template]
+            self._save()
+
+    @staticmethod
+    def _cast(kind: str, text: str):
+        return {"int": int, "float": float, "str": str}[kind](text)
+
+    # ── Persistence ─────────────────────────────────────────
+    def _load(self) -> list[dict]:
+        if not self.path.exists():
+            return []
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Plan cache unreadable ({e}); starting empty.")
+            return []
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.templates, indent=2), encoding="utf-8")
+        tmp_path.replace(self.path)
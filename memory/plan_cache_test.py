@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from agent.agent_session import AgentSession, PerceptionSnapshot, Step, ToolCode
+from memory.plan_cache import MAX_CONSECUTIVE_FAILURES, PlanCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PlanCache(str(tmp_path / "plan_cache.json"))
+
+
+def solved_session(query: str, code: str, result: str, summary: str) -> AgentSession:
+    session = AgentSession(session_id="s1", original_query=query)
+    perception = PerceptionSnapshot(entities=[], result_requirement="", original_goal_achieved=True, reasoning="",
+                                    local_goal_achieved=True, local_reasoning="", last_tooluse_summary="",
+                                    solution_summary=summary, confidence="0.9")
+    step = Step(index=0, description="Compute it", type="CODE",
+                code=ToolCode(tool_name="raw_code_block", tool_arguments={"code": code}),
+                execution_result={"status": "success", "result": result}, perception=perception, status="completed")
+    session.add_plan_version(["Step 0: Compute it"], [step])
+    session.state["original_goal_achieved"] = True
+    return session
+
+
+# ── Templates ───────────────────────────────────────────────
+def test_shared_literal_becomes_a_parameter(cache):
+    cache.templates = [cache.build_template("ASCII values of INDIA", 'return strings_to_chars_to_int("INDIA")')]
+    template, code = cache.match("ASCII values of CHINA")
+    assert template["params"] == [{"name": "p0", "type": "str", "value": "INDIA"}]
+    assert code == "return strings_to_chars_to_int('CHINA')"
+
+
+def test_numeric_parameters_are_cast(cache):
+    cache.templates = [cache.build_template("What is 12 plus 30?", "return add(12, 30)")]
+    assert cache.match("What is 100 plus 5?")[1] == "return add(100, 5)"
+    assert cache.match("What is ten plus 5?") is None
+
+
+def test_literal_used_twice_in_the_code_is_rejected(cache):
+    cache.templates = [cache.build_template("Is 7 equal to 7?", "return equals(7, 7)")]
+    assert cache.templates[0] is None  # 7 appears twice in the code
+
+
+def test_literal_colliding_with_another_constant_is_rejected(cache):
+    # the 1 in the query can't be told apart from the 1 in `1 + 1`: rendering "first 5" would give range(5, 5 + 5)
+    template = cache.build_template("sum of the first 1 powers of 2", "return sum(2 ** i for i in range(1, 1 + 1))")
+    assert template is None
+
+
+def test_literals_not_in_the_query_stay_fixed(cache):
+    cache.templates = [cache.build_template("first 10 fibonacci numbers", "return fibonacci_numbers(10)[0:100]")]
+    assert cache.match("first 25 fibonacci numbers")[1] == "return fibonacci_numbers(25)[0:100]"
+
+
+def test_colliding_templates_from_older_files_are_not_rendered(cache):
+    cache.templates = [{
+        "query_template": r"first\ (?P<p0>-?\d+)\ powers", "code": "return range(1, 1 + 1)",
+        "params": [{"name": "p0", "type": "int", "value": 1}],
+    }]
+    assert cache.match("first 5 powers") is None
+
+
+# ── Recording ───────────────────────────────────────────────
+def test_record_stores_a_summary_template(cache):
+    session = solved_session("ASCII values of INDIA", 'return strings_to_chars_to_int("INDIA")',
+                             "[73, 78, 68, 73, 65]", "The ASCII values are [73, 78, 68, 73, 65].")
+    assert cache.record(session)
+    assert cache.templates[0]["summary_template"] == "The ASCII values are {result}."
+    assert json.loads(cache.path.read_text())[0]["source_session"] == "s1"
+
+
+@pytest.mark.parametrize("result, summary", [
+    ("2", "There are 2 results: 2 and 2."),  # short result
+    ("", "Nothing found."),  # empty result
+    ("[1, 2]", "Got [1, 2], i.e. [1, 2]."),  # result occurs twice
+])
+def test_summary_is_not_templated_around_ambiguous_results(cache, result, summary):
+    assert cache.record(solved_session("What is 12 plus 30?", "return add(12, 30)", result, summary))
+    assert cache.templates[0]["summary_template"] is None
+
+
+def test_plan_cache_hits_are_not_recorded_again(cache):
+    session = solved_session("What is 12 plus 30?", "return add(12, 30)", "42", "42")
+    session.state["plan_cache_hit"] = True
+    assert not cache.record(session)
+
+
+# ── Failures ────────────────────────────────────────────────
+def test_repeatedly_failing_template_is_dropped(cache):
+    cache.templates = [cache.build_template("What is 12 plus 30?", "return add(12, 30)")]
+    cache.templates[0].update({"hits": 0, "failures": 0})
+    template = cache.templates[0]
+    for _ in range(MAX_CONSECUTIVE_FAILURES):
+        cache.report(template, False)
+    assert cache.templates == []
+    cache.report(template, False)  # a session still holding it doesn't fail
+    assert cache.templates == []
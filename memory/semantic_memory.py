@@ -0,0 +1,200 @@
+"""
+Semantic memory for MemorySearch: past sessions' query + summary embedded once (Ollama, same
+model as mcp_server_2's RAG index) and searched with FAISS, so paraphrased queries still find
+them.
+
+    AGENT_MEMORY_MODE=semantic   # nearest sessions by embedding
+    AGENT_MEMORY_MODE=hybrid     # semantic candidates re-ranked with the fuzzy score
+
+Embeddings are cached by content hash in an append-only pair of files next to the session logs
+(.semantic_cache.jsonl + .semantic_cache.f32), so each entry is embedded once across restarts;
+the FAISS index itself is rebuilt in memory from that cache.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+import faiss
+import numpy as np
+import requests
+
+EMBED_URL = "http://localhost:11434/api/embeddings"
+EMBED_MODEL = "nomic-embed-text"
+EMBED_TIMEOUT = 10  # seconds
+CACHE_NAME = ".semantic_cache"
+QUERY_CACHE_SIZE = 256
+HNSW_MIN_ENTRIES = 50_000  # exact inner-product search below this, HNSW graph above
+HNSW_NEIGHBORS = 32
+HNSW_STALE_FRACTION = 0.2  # rebuild the HNSW graph once removed vectors exceed this share of the live ones
+
+
+def get_embedding(text: str) -> np.ndarray:
+    result = requests.post(EMBED_URL, json={"model": EMBED_MODEL, "prompt": text}, timeout=EMBED_TIMEOUT)
+    result.raise_for_status()
+    return np.array(result.json()["embedding"], dtype=np.float32)
+
+
+def entry_text(entry: dict) -> str:
+    return f"{entry['query']}\n{entry['solution_summary']}"
+
+
+def entry_key(entry: dict) -> int:
+    """Stable 63-bit FAISS id from the entry's content (identical entries share one vector)."""
+    digest = hashlib.sha1("\0".join((entry["query"], entry["solution_summary"],
+                                     entry.get("result_requirement", ""))).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") >> 1
+
+
+class SemanticMemory:
+    """Content-keyed embedding cache plus a FAISS inner-product index over the live entries."""
+
+    def __init__(self, cache_dir: Path, embed: Callable[[str], np.ndarray] = get_embedding):
+        self.embed = embed
+        self.meta_path = cache_dir / f"{CACHE_NAME}.jsonl"
+        self.vector_path = cache_dir / f"{CACHE_NAME}.f32"
+        self.dim: Optional[int] = None
+        self.rows: dict[int, int] = {}  # entry key → row in the vector file
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.index = None
+        self.live: dict[int, dict] = {}  # entry key → entry, for what is in the index
+        self.indexed: set[int] = set()  # keys with a vector in the index (live, or hidden until the next HNSW rebuild)
+        self._search_params = self._selectors = None
+        self._keys: dict[int, tuple[dict, int]] = {}  # id(entry) → (entry, key): hash each entry object once
+        self._synced: Optional[list] = None
+        self._query_vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()  # concurrent sessions share one MemorySearch
+        self._load_cache()
+
+    # ── Embedding cache ─────────────────────────────────────
+    def _load_cache(self):
+        if not self.meta_path.exists() or not self.vector_path.exists():
+            return
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            self.dim = header["dim"]
+            vectors = np.fromfile(self.vector_path, dtype=np.float32)
+            self.vectors = vectors[:len(vectors) // self.dim * self.dim].reshape(-1, self.dim)
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:  # torn last line
+                    break
+                if record["row"] < len(self.vectors):  # metadata is written after its vector
+                    self.rows[record["key"]] = record["row"]
+
+    def _cache_vectors(self, keys: list[int], vectors: np.ndarray):
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self.vectors = np.empty((0, self.dim), dtype=np.float32)
+            self.meta_path.write_text(json.dumps({"dim": self.dim, "model": EMBED_MODEL}) + "\n", encoding="utf-8")
+            self.vector_path.write_bytes(b"")
+        first_row = len(self.vectors)
+        with open(self.vector_path, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self.meta_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps({"key": key, "row": first_row + i}) + "\n" for i, key in enumerate(keys))
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.rows.update((key, first_row + i) for i, key in enumerate(keys))
+
+    def _embed_many(self, texts: list[str]) -> np.ndarray:
+        vectors = np.stack([self.embed(text) for text in texts]).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    # ── Index ───────────────────────────────────────────────
+    def sync(self, entries: list[dict]):
+        """Make the index hold exactly `entries`, embedding only ones never seen before."""
+        with self._lock:
+            self._sync(entries)
+
+    def _sync(self, entries: list[dict]):
+        if entries is self._synced:
+            return
+        live, keys = {}, {}
+        for entry in entries:
+            cached = self._keys.get(id(entry))
+            if cached is None or cached[0] is not entry:
+                cached = (entry, entry_key(entry))
+            keys[id(entry)] = cached
+            live.setdefault(cached[1], entry)
+        missing = [key for key in live if key not in self.rows]
+        if missing:
+            print(f"🧠 Embedding {len(missing)} new memory entr{'y' if len(missing) == 1 else 'ies'}...")
+            self._cache_vectors(missing, self._embed_many([entry_text(live[key]) for key in missing]))
+        if not live:
+            self.index, self.indexed, self.live, self._keys, self._synced = None, set(), live, keys, entries
+            self._set_hidden([])
+            return
+
+        use_hnsw = len(live) >= HNSW_MIN_ENTRIES
+        stale = [key for key in self.indexed if key not in live]
+        if self.index is None or use_hnsw != self._is_hnsw() or len(stale) > HNSW_STALE_FRACTION * len(live):
+            self.index, self.indexed = self._new_index(use_hnsw), set()
+        elif stale and not use_hnsw:
+            self.index.remove_ids(np.array(stale, dtype=np.int64))
+            self.indexed.difference_update(stale)
+        added = [key for key in live if key not in self.indexed]
+        if added:
+            self.index.add_with_ids(self.vectors[[self.rows[key] for key in added]], np.array(added, dtype=np.int64))
+            self.indexed.update(added)
+        self._set_hidden([key for key in self.indexed if key not in live])
+        self.live, self._keys, self._synced = live, keys, entries
+
+    def _set_hidden(self, keys: list[int]):
+        """HNSW can't remove vectors: search around removed entries until enough pile up to rebuild."""
+        if not keys:
+            self._search_params = self._selectors = None
+            return
+        batch = faiss.IDSelectorBatch(np.array(keys, dtype=np.int64))
+        self._selectors = (batch, faiss.IDSelectorNot(batch))  # the SWIG wrappers don't keep `batch` alive
+        self._search_params = faiss.SearchParametersHNSW(sel=self._selectors[1])
+
+    def _new_index(self, hnsw: bool):
+        if hnsw:
+            base = faiss.IndexHNSWFlat(self.dim, HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        else:
+            base = faiss.IndexFlatIP(self.dim)
+        return faiss.IndexIDMap2(base)
+
+    def _is_hnsw(self) -> bool:
+        return isinstance(faiss.downcast_index(self.index.index), faiss.IndexHNSWFlat)
+
+    def search(self, user_query: str, k: int, within=None) -> list[tuple[float, dict]]:
+        """(cosine similarity, entry) pairs, best first; `within` (ids of synced entries) restricts the candidates."""
+        with self._lock:
+            vector = self._query_vectors.get(user_query)
+        if vector is None:
+            vector = self._embed_many([user_query])  # outside the lock: a slow embedding call doesn't block others
+        with self._lock:
+            self._query_vectors[user_query] = vector
+            self._query_vectors.move_to_end(user_query)
+            if len(self._query_vectors) > QUERY_CACHE_SIZE:
+                self._query_vectors.popitem(last=False)
+            if not self.live:
+                return []
+            if within is not None:
+                return self._search_within(vector, k, within)
+            similarities, keys = self.index.search(vector, min(k, len(self.live)), params=self._search_params)
+            return [(float(s), self.live[int(key)]) for s, key in zip(similarities[0], keys[0]) if key != -1]
+
+    def _search_within(self, vector: np.ndarray, k: int, within) -> list[tuple[float, dict]]:
+        """Exact scan of a small candidate set; an ID selector over the HNSW graph for large ones."""
+        chosen: dict[int, dict] = {}  # key → the caller's entry object
+        for entry_id in within:
+            cached = self._keys.get(entry_id)
+            if cached is not None:
+                chosen.setdefault(cached[1], cached[0])
+        if not chosen:
+            return []
+        keys = np.fromiter(chosen, dtype=np.int64, count=len(chosen))
+        if len(chosen) < HNSW_MIN_ENTRIES or not self._is_hnsw():
+            similarities = self.vectors[[self.rows[key] for key in chosen]] @ vector[0]
+            best = np.argsort(-similarities, kind="stable")[:k]
+            return [(float(similarities[i]), chosen[int(keys[i])]) for i in best]
+        selector = faiss.IDSelectorBatch(keys)
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(HNSW_NEIGHBORS, 2 * k))
+        similarities, found = self.index.search(vector, min(k, len(chosen)), params=params)
+        return [(float(s), chosen[int(key)]) for s, key in zip(similarities[0], found[0]) if key != -1]
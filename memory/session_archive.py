@@ -0,0 +1,203 @@
+"""
+Archival and retention for the JSON session store (memory/session_logs/YYYY/MM/DD/<uuid>.json).
+
+Day directories older than `archive_after_days` are packed into YYYY/MM/DD.jsonl.gz: one
+gzip member per session (a valid multi-member gzip stream, so `zcat` works), plus a
+DD.jsonl.idx offset index {session_id: [offset, length]} for reading one session without
+decompressing the rest. Archives past `max_age_days`, and the oldest ones while the tree is
+above `max_bytes`, are deleted. MemorySearch and `load_session` read archives transparently.
+
+    python -m memory.session_archive --archive-after 7 --max-age 365 --max-size 2G
+"""
+import argparse
+import gzip
+import json
+import re
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+ARCHIVE_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".jsonl.idx"
+ARCHIVE_AFTER_DAYS = 7
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text: str) -> int:
+    """'500M' → 524288000. Bare numbers are bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid size '{text}' (expected e.g. 500M or 2G)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def _day_of(path: Path, base: Path) -> Optional[date]:
+    """Date of a YYYY/MM/DD directory or YYYY/MM/DD.jsonl.gz archive under `base`."""
+    parts = path.relative_to(base).parts
+    if len(parts) != 3:
+        return None
+    try:
+        return date(int(parts[0]), int(parts[1]), int(parts[2].split(".", 1)[0]))
+    except ValueError:
+        return None
+
+
+def archive_paths(day_dir: Path) -> tuple[Path, Path]:
+    return day_dir.with_name(day_dir.name + ARCHIVE_SUFFIX), day_dir.with_name(day_dir.name + INDEX_SUFFIX)
+
+
+def _read_index(index_path: Path) -> dict[str, list[int]]:
+    if not index_path.exists():
+        return {}
+    return json.loads(index_path.read_text(encoding="utf-8"))
+
+
+def _write_index(index_path: Path, index: dict[str, list[int]]):
+    tmp_path = index_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    tmp_path.replace(index_path)
+
+
+# ─── Archiving ──────────────────────────────────────────────
+def archive_day(day_dir: Path) -> int:
+    """
+    Move a day directory's session snapshots into its archive, appending to an existing one
+    (a resumed session can land in an already archived day). Event logs of interrupted
+    sessions stay in place so they can still be resumed. Returns the number archived.
+    """
+    archive_path, index_path = archive_paths(day_dir)
+    snapshots = sorted(day_dir.glob("*.json"))
+    if not snapshots:
+        return 0
+
+    index = _read_index(index_path)
+    offset = archive_path.stat().st_size if archive_path.exists() else 0
+    archived = []
+    with open(archive_path, "ab") as f:
+        for path in snapshots:
+            try:
+                session = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Not archiving '{path}': {e}")
+                continue
+            member = gzip.compress((json.dumps(session, ensure_ascii=False, separators=(",", ":")) + "\n")
+                                   .encode("utf-8"), compresslevel=6, mtime=0)
+            f.write(member)
+            index[session.get("session_id", path.stem)] = [offset, len(member)]
+            offset += len(member)
+            archived.append(path)
+        f.flush()
+    _write_index(index_path, index)  # after the data: a crash leaves extra bytes, never a dangling offset
+
+    for path in archived:
+        path.unlink()
+    if not any(day_dir.iterdir()):
+        day_dir.rmdir()
+    return len(archived)
+
+
+def enforce_retention(base_dir: str = "memory/session_logs", archive_after_days: int = ARCHIVE_AFTER_DAYS,
+                      max_age_days: Optional[int] = None, max_bytes: Optional[int] = None,
+                      today: Optional[date] = None) -> dict:
+    """Archive old day directories, then drop archives past the age limit and the oldest ones over the size limit."""
+    base = Path(base_dir)
+    today = today or date.today()
+    stats = {"archived_sessions": 0, "archived_days": 0, "deleted_archives": 0}
+    if not base.exists():
+        return stats
+
+    for day_dir in sorted(p for p in base.glob("*/*/*") if p.is_dir()):
+        day = _day_of(day_dir, base)
+        if day and day < today - timedelta(days=archive_after_days):
+            archived = archive_day(day_dir)
+            if archived:
+                stats["archived_sessions"] += archived
+                stats["archived_days"] += 1
+
+    archives = sorted((p for p in base.glob(f"*/*/*{ARCHIVE_SUFFIX}") if _day_of(p, base)),
+                      key=lambda p: _day_of(p, base))
+    if max_age_days is not None:
+        while archives and _day_of(archives[0], base) < today - timedelta(days=max_age_days):
+            _delete_archive(archives.pop(0))
+            stats["deleted_archives"] += 1
+    if max_bytes is not None:
+        total = sum(p.stat().st_size for p in base.rglob("*") if p.is_file())
+        while archives and total > max_bytes:
+            oldest = archives.pop(0)
+            total -= sum(p.stat().st_size for p in (oldest, _index_of(oldest)) if p.exists())
+            _delete_archive(oldest)
+            stats["deleted_archives"] += 1
+        if total > max_bytes:
+            print(f"⚠️ {base} is still {total / 1024 ** 2:.1f} MB after deleting every archive; "
+                  f"lower --archive-after to pack recent days too.")
+        stats["total_bytes"] = total
+    return stats
+
+
+def _index_of(archive_path: Path) -> Path:
+    return archive_path.with_name(archive_path.name[:-len(ARCHIVE_SUFFIX)] + INDEX_SUFFIX)
+
+
+def _delete_archive(archive_path: Path):
+    archive_path.unlink()
+    _index_of(archive_path).unlink(missing_ok=True)
+    for parent in (archive_path.parent, archive_path.parent.parent):  # empty MM/ and YYYY/ directories
+        if not any(parent.iterdir()):
+            parent.rmdir()
+
+
+# ─── Reading ────────────────────────────────────────────────
+def read_archive(archive_path: Path) -> Iterator[dict]:
+    """
+    The sessions of one archive. Driven by the index, so re-archived sessions appear once and
+    unindexed bytes are ignored.
+    """
+    data = archive_path.read_bytes()
+    for offset, length in sorted(_read_index(_index_of(archive_path)).values()):
+        yield json.loads(gzip.decompress(data[offset:offset + length]))
+
+
+def iter_archived_sessions(base_dir: str = "memory/session_logs") -> Iterator[tuple[Path, dict]]:
+    """Every archived session as (archive path, session dict), one archive in memory at a time."""
+    for archive_path in sorted(Path(base_dir).rglob(f"*{ARCHIVE_SUFFIX}")):
+        try:
+            for session in read_archive(archive_path):
+                yield archive_path, session
+        except (OSError, EOFError, ValueError) as e:
+            print(f"⚠️ Stopped reading '{archive_path}': {e}")
+
+
+def find_archived_session(session_id: str, base_dir: str = "memory/session_logs") -> Optional[tuple[Path, str]]:
+    """(archive path, full session ID) for an ID or unique prefix, using only the offset indexes."""
+    matches = []
+    for index_path in Path(base_dir).rglob(f"*{INDEX_SUFFIX}"):
+        matches.extend((index_path, sid) for sid in _read_index(index_path) if sid.startswith(session_id))
+    exact = [m for m in matches if m[1] == session_id]
+    if exact or len(matches) == 1:
+        index_path, sid = (exact or matches)[0]
+        return index_path.with_name(index_path.name[:-len(INDEX_SUFFIX)] + ARCHIVE_SUFFIX), sid
+    if matches:
+        raise ValueError(f"Session ID prefix '{session_id}' is ambiguous: {', '.join(sorted(m[1] for m in matches)[:5])}")
+    return None
+
+
+def read_archived_session(archive_path: Path, session_id: str) -> dict:
+    """Decompress just one session's gzip member."""
+    offset, length = _read_index(_index_of(archive_path))[session_id]
+    with open(archive_path, "rb") as f:
+        f.seek(offset)
+        return json.loads(gzip.decompress(f.read(length)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old session log days and enforce retention limits.")
+    parser.add_argument("--base-dir", default="memory/session_logs")
+    parser.add_argument("--archive-after", type=int, default=ARCHIVE_AFTER_DAYS, metavar="DAYS",
+                        help=f"pack day directories older than this (default: {ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--max-age", type=int, metavar="DAYS", help="delete archives older than this")
+    parser.add_argument("--max-size", type=parse_size, metavar="SIZE", help="delete the oldest archives above this (e.g. 2G)")
+    args = parser.parse_args()
+
+    result = enforce_retention(args.base_dir, args.archive_after, args.max_age, args.max_size)
+    print(f"📦 Archived {result['archived_sessions']} session(s) from {result['archived_days']} day(s), "
+          f"deleted {result['deleted_archives']} archive(s).")
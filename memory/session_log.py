@@ -1,42 +1,413 @@
+import atexit
 import json
+import os
+import queue
+import threading
+import time
+import weakref
+import zlib
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
+
+from agent.agent_session import AgentSession
+from memory.session_archive import find_archived_session, read_archived_session
+from memory.session_store import SQLiteSessionStore, get_session_store
+from agent.metrics import (SESSION_LOG_COALESCED, SESSION_LOG_QUEUE_DEPTH, SESSION_LOG_QUEUE_FULL,
+                           SESSION_LOG_SECONDS, SESSION_LOG_WRITES)
+
+EVENT_LOG_SUFFIX = ".events.jsonl"
+FSYNC_POLICIES = ("never", "session_end", "always")  # always: every flushed event log too
+FSYNC_ENV = "AGENT_SESSION_FSYNC"
+FLUSH_INTERVAL = 0.2  # seconds an update may wait to be coalesced with later ones
+MAX_QUEUED_WRITES = 1024
+
+
+# ─── Live updates: append-only event log ────────────────────
+@dataclass
+class _LogCursor:
+    """What has already been queued for a session's event log (serialized component → last logged JSON)."""
+    store_path: Path
+    started: bool = False
+    perception: Optional[str] = None
+    state: Optional[str] = None
+    timings: Optional[str] = None
+    plan_versions: int = 0
+    steps: dict[tuple[int, int], str] = field(default_factory=dict)  # (version, position) → step JSON
+
+
+_cursors: "weakref.WeakKeyDictionary[AgentSession, _LogCursor]" = weakref.WeakKeyDictionary()
+_cursors_lock = threading.Lock()
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def frame_record(record: dict) -> str:
+    """One log line: CRC32 of the JSON payload, a space, the payload. Torn or corrupt lines fail the check."""
+    payload = _dumps(record)
+    return f"{zlib.crc32(payload.encode('utf-8')):08x} {payload}\n"
+
+
+def read_event_log(path: Path) -> list[dict]:
+    """Records up to the first torn or corrupt line (anything after it can't be trusted)."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            crc, _, payload = line.partition(" ")
+            if not line.endswith("\n") or f"{zlib.crc32(payload[:-1].encode('utf-8')):08x}" != crc:
+                print(f"⚠️ Event log {path.name}: stopping at a torn/corrupt record after {len(records)} record(s).")
+                break
+            records.append(json.loads(payload))
+    return records
+
+
+def session_record(session_obj) -> dict:
+    return {"type": "session", "data": {
+        "session_id": session_obj.session_id,
+        "original_query": session_obj.original_query,
+        "created_at": session_obj.created_at
+    }}
+
+
+def session_deltas(session_obj, cursor: _LogCursor) -> list[dict]:
+    """Records for everything that changed since the last append. Only the newest plan versions are scanned."""
+    records = []
+    if not cursor.started:
+        records.append(session_record(session_obj))
+
+    perception = _dumps(session_obj.perception.to_dict()) if session_obj.perception else None
+    if perception != cursor.perception:
+        records.append({"type": "perception", "data": json.loads(perception) if perception else None})
+
+    # Steps of older versions are frozen once a newer version exists; re-check the previous newest one
+    for v in range(max(0, cursor.plan_versions - 1), len(session_obj.plan_versions)):
+        version = session_obj.plan_versions[v]
+        if v >= cursor.plan_versions:
+            records.append({"type": "plan_version", "version": v, "data": version["plan_text"]})
+        for position, step in enumerate(version["steps"]):
+            step_json = _dumps(step.to_dict())
+            if cursor.steps.get((v, position)) != step_json:
+                records.append({"type": "step", "version": v, "position": position, "data": json.loads(step_json)})
+
+    for component in ("state", "timings"):
+        serialized = _dumps(getattr(session_obj, component))
+        if serialized != getattr(cursor, component):
+            records.append({"type": component, "data": json.loads(serialized)})
+    return records
+
+
+def _advance(cursor: _LogCursor, records: list[dict]):
+    for record in records:
+        kind = record["type"]
+        if kind == "session":
+            cursor.started = True
+        elif kind == "plan_version":
+            cursor.plan_versions = max(cursor.plan_versions, record["version"] + 1)
+        elif kind == "step":
+            cursor.steps[(record["version"], record["position"])] = _dumps(record["data"])
+        else:
+            setattr(cursor, kind, _dumps(record["data"]) if record["data"] is not None else None)
+
+
+def session_events_since_last_update(session_obj, base_dir: str = "memory/session_logs") -> tuple[Path, list[dict]]:
+    """The session's store path and its changes since the previous call (marked as logged)."""
+    with _cursors_lock:
+        cursor = _cursors.get(session_obj)
+        if cursor is None:
+            store_path = get_store_path(session_obj.session_id, base_dir, session_obj.created_at, mkdir=False)
+            cursor = _cursors[session_obj] = _LogCursor(store_path=store_path)
+
+        records = session_deltas(session_obj, cursor)
+        _advance(cursor, records)
+        return cursor.store_path, records
+
+
+def append_records(path: Path, records: list[dict], fsync: bool = False):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(frame_record(r) for r in records))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def replay_events(records: list[dict]) -> dict:
+    """Fold event records back into the `AgentSession.to_json` shape."""
+    snapshot = {"plan_versions": []}
+    for record in records:
+        kind, data = record["type"], record["data"]
+        if kind == "session":
+            snapshot.update(data)
+        elif kind in ("perception", "state", "timings"):
+            snapshot[kind] = data
+        elif kind == "plan_version":
+            versions = snapshot["plan_versions"]
+            while len(versions) <= record["version"]:
+                versions.append({"plan_text": [], "steps": []})
+            versions[record["version"]]["plan_text"] = data
+        elif kind == "step":
+            steps = snapshot["plan_versions"][record["version"]]["steps"]
+            while len(steps) <= record["position"]:
+                steps.append(None)
+            steps[record["position"]] = data
+    return snapshot
+
+
+def event_log_path(store_path: Path) -> Path:
+    return store_path.with_name(store_path.stem + EVENT_LOG_SUFFIX)
 
 
 def live_update_session(session_obj, base_dir: str = "memory/session_logs") -> None:
     """
-    Update (or overwrite) the session file with latest data.
-    In per-file format, this is identical to append.
+    Queue the session's latest changes (perception, new plan versions, changed steps, state) for
+    its event log. Only the delta is computed here; the background writer does the disk I/O.
     """
 
     try:
-        append_session_to_store(session_obj, base_dir)
+        store_path, records = session_events_since_last_update(session_obj, base_dir)
+        if records:
+            get_session_writer().submit(_WriteJob(store_path, session_obj.session_id, records=records,
+                                                  header=session_record(session_obj)))
         print("📝 Session live-updated.")
     except Exception as e:
+        SESSION_LOG_WRITES.inc(outcome="error")
         print(f"❌ Failed to update session: {e}")
 
 
-def append_session_to_store(session_obj, base_dir: str = "memory/session_logs") -> None:
+def compact_session(session_obj, base_dir: str = "memory/session_logs") -> None:
+    """At session end: queue the full snapshot, which replaces the event log and is flushed right away."""
+    try:
+        session_data = session_snapshot(session_obj)
+        with _cursors_lock:
+            _cursors.pop(session_obj, None)
+        store_path = get_store_path(session_data["session_id"], base_dir, session_data.get("created_at"), mkdir=False)
+        get_session_writer().submit(_WriteJob(store_path, session_data["session_id"], snapshot=session_data))
+    except Exception as e:
+        SESSION_LOG_WRITES.inc(outcome="error")
+        print(f"❌ Failed to compact session log: {e}")
+
+
+# ─── Background writer ──────────────────────────────────────
+@dataclass
+class _WriteJob:
+    store_path: Optional[Path]
+    session_id: Optional[str] = None
+    records: list[dict] = field(default_factory=list)
+    snapshot: Optional[dict] = None  # replaces the event log once written
+    header: Optional[dict] = None  # the "session" record, so the store can recreate a row lost to a failed flush
+    done: Optional[threading.Event] = None  # flush barrier: set once everything queued before it is on disk
+
+
+_STOP = object()
+
+
+def _record_key(record: dict) -> tuple:
+    return record["type"], record.get("version"), record.get("position")
+
+
+class SessionWriter:
+    """
+    Writes session logs from a daemon thread so disk latency never shows up in step latency.
+
+    The queue is bounded: a stalled disk slows producers down instead of growing memory.
+    Updates to the same session are coalesced (a step logged three times in one window is
+    written once) and flushed every `flush_interval` seconds, when a session ends, on
+    `flush()`, and on `close()`, which also runs at interpreter exit.
+
+    With a SQLite `store`, each flush is one transaction instead of per-session files.
+    """
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL, fsync: str = "session_end",
+                 max_queue: int = MAX_QUEUED_WRITES, store: Optional[SQLiteSessionStore] = None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync policy must be one of {FSYNC_POLICIES}, got '{fsync}'")
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.store = store
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._dirs: set[Path] = set()
+        self._closed = False
+        self._lock = threading.Lock()  # orders every enqueue against close()'s stop marker
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, job: _WriteJob):
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    SESSION_LOG_QUEUE_FULL.inc()
+                    self._queue.put(job)
+                SESSION_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+                return
+        # late updates after shutdown are written inline, once the drain has written everything before them
+        self._thread.join()
+        if job.store_path is not None:
+            self._write([job])
+        if job.done:
+            job.done.set()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted so far is written."""
+        done = threading.Event()
+        self.submit(_WriteJob(None, done=done))
+        return done.wait(timeout)
+
+    def close(self):
+        """Drain the queue and stop the thread."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)  # nothing can be queued behind it: submit() checks `_closed` under the lock
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        pending: dict[Path, _WriteJob] = {}
+        waiters: list[threading.Event] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                job = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                job = None  # flush timer
+            SESSION_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+
+            if job is not None and job is not _STOP:
+                if job.done:
+                    waiters.append(job.done)
+                else:
+                    self._coalesce(pending, job)
+                    deadline = deadline or time.monotonic() + self.flush_interval
+
+            flush_now = job is None or job is _STOP or waiters or (job.snapshot is not None)
+            if flush_now and (pending or waiters):
+                self._write(list(pending.values()))
+                pending.clear()
+                deadline = None
+                for done in waiters:
+                    done.set()
+                waiters.clear()
+            if job is _STOP:
+                return
+
+    @staticmethod
+    def _coalesce(pending: dict[Path, _WriteJob], job: _WriteJob):
+        current = pending.get(job.store_path)
+        if current is None:
+            pending[job.store_path] = job
+            return
+        if job.snapshot is not None:  # the snapshot supersedes every earlier update of the session
+            SESSION_LOG_COALESCED.inc(len(current.records))
+            current.records, current.snapshot = [], job.snapshot
+            return
+        current.header = job.header or current.header
+        merged = {_record_key(r): r for r in current.records}
+        for record in job.records:
+            merged[_record_key(record)] = record  # newest data, first position (plan versions stay before their steps)
+        SESSION_LOG_COALESCED.inc(len(current.records) + len(job.records) - len(merged))
+        current.records = list(merged.values())
+
+    def _write(self, jobs: list[_WriteJob]):
+        if self.store is not None:
+            self._write_store(jobs)
+            return
+        for job in jobs:
+            start = time.perf_counter()
+            try:
+                if job.store_path.parent not in self._dirs:
+                    job.store_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._dirs.add(job.store_path.parent)
+                if job.snapshot is not None:
+                    write_snapshot(job.store_path, job.snapshot, fsync=self.fsync != "never")
+                    event_log_path(job.store_path).unlink(missing_ok=True)
+                if job.records:
+                    append_records(event_log_path(job.store_path), job.records, fsync=self.fsync == "always")
+                SESSION_LOG_WRITES.inc(outcome="ok")
+            except Exception as e:
+                SESSION_LOG_WRITES.inc(outcome="error")
+                print(f"❌ Failed to write session log {job.store_path.name}: {e}")
+            finally:
+                SESSION_LOG_SECONDS.observe(time.perf_counter() - start)
+
+    def _write_store(self, jobs: list[_WriteJob]):
+        start = time.perf_counter()
+        try:
+            # event rows reference the session row: carry it in every batch (INSERT OR IGNORE)
+            self.store.write_batch([(job.session_id, [job.header, *job.records] if job.header else job.records,
+                                     job.snapshot) for job in jobs], fsync=self.fsync)
+            SESSION_LOG_WRITES.inc(len(jobs), outcome="ok")
+        except Exception as e:
+            SESSION_LOG_WRITES.inc(len(jobs), outcome="error")
+            print(f"❌ Failed to write {len(jobs)} session update(s) to {self.store.path}: {e}")
+        finally:
+            SESSION_LOG_SECONDS.observe(time.perf_counter() - start)
+
+
+_writer: Optional[SessionWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_session_writer() -> SessionWriter:
     """
-    Save the session object as a standalone file. If a file already exists and is corrupt,
-    it will be overwritten with fresh data.
+    The process-wide writer, started on first use (fsync policy from $AGENT_SESSION_FSYNC,
+    SQLite instead of JSON files when $AGENT_SESSION_STORE selects it).
     """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SessionWriter(fsync=os.getenv(FSYNC_ENV, "session_end"), store=get_session_store())
+        return _writer
+
+
+def configure_session_writer(**kwargs) -> SessionWriter:
+    """Replace the process-wide writer (draining the old one), e.g. `configure_session_writer(fsync="always")`."""
+    global _writer
+    kwargs.setdefault("store", get_session_store())
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+        _writer = SessionWriter(**kwargs)
+        return _writer
+
+
+def flush_session_writes(timeout: Optional[float] = None) -> bool:
+    """Wait for queued session writes, e.g. before reading the store from the same process."""
+    return _writer.flush(timeout) if _writer is not None else True
+
+
+# ─── Snapshots ──────────────────────────────────────────────
+def session_snapshot(session_obj) -> dict:
     session_data = session_obj.to_json()
+    session_data["state"] = dict(session_data["state"])  # detach from the live session for the writer thread
+    session_data["timings"] = dict(session_data["timings"])
     session_data["_session_id_short"] = simplify_session_id(session_data["session_id"])
+    return session_data
 
-    store_path = get_store_path(session_data["session_id"], base_dir)
 
-    if store_path.exists():
-        try:
-            with open(store_path, "r", encoding="utf-8") as f:
-                existing = f.read().strip()
-                if existing:
-                    json.loads(existing)
-        except json.JSONDecodeError:
-            print(f"⚠️ Warning: Corrupt JSON detected in {store_path}. Overwriting.")
+def write_snapshot(store_path: Path, session_data: dict, fsync: bool = False):
+    """Atomically replace the snapshot file (tmp file + rename)."""
+    tmp_path = store_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(_dumps(session_data))  # compact: indent=2 forces json's pure-Python encoder
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    tmp_path.replace(store_path)
 
-    with open(store_path, "w", encoding="utf-8") as f:
-        json.dump(session_data, f, indent=2)
+
+def append_session_to_store(session_obj, base_dir: str = "memory/session_logs") -> None:
+    """
+    Save the session object as a standalone snapshot file right away, bypassing the background writer.
+    """
+    session_data = session_snapshot(session_obj)
+    store_path = get_store_path(session_data["session_id"], base_dir, session_data.get("created_at"))
+    write_snapshot(store_path, session_data)
 
     print(f"✅ Session stored: {store_path}")
 
@@ -48,13 +419,60 @@ def simplify_session_id(session_id: str) -> str:
     return session_id.split("-")[0]
 
 
-def get_store_path(session_id: str, base_dir: str = "memory/session_logs") -> Path:
+def get_store_path(session_id: str, base_dir: str = "memory/session_logs", created_at: float | None = None,
+                   mkdir: bool = True) -> Path:
     """
-    Construct the full path to the session file based on current date and session ID.
+    Construct the full path to the session file based on the session's start date and ID,
+    so a resumed session keeps writing to the file it started in.
     Format: memory/session_ logs/YYYY/MM/DD/<session_id>.json
     """
-    now = datetime.now()
+    now = datetime.fromtimestamp(created_at) if created_at else datetime.now()
     day_dir = Path(base_dir) / str(now.year) / f"{now.month:02d}" / f"{now.day:02d}"
-    day_dir.mkdir(parents=True, exist_ok=True)
+    if mkdir:
+        day_dir.mkdir(parents=True, exist_ok=True)
     filename = f"{session_id}.json"
     return day_dir / filename
+
+
+# ─── Loading ────────────────────────────────────────────────
+def find_session_file(session_id: str, base_dir: str = "memory/session_logs") -> Path:
+    """
+    Locate a stored session by full ID or unique prefix (e.g. the short ID printed in logs).
+    An event log wins over a snapshot: it only exists while the session is in flight (or was
+    interrupted), and it always carries the complete state.
+    """
+    root = Path(base_dir)
+    candidates = {}
+    for path in [*root.rglob(f"{session_id}*.json"), *root.rglob(f"{session_id}*{EVENT_LOG_SUFFIX}")]:
+        sid = path.name[:-len(EVENT_LOG_SUFFIX)] if path.name.endswith(EVENT_LOG_SUFFIX) else path.stem
+        if path.name.endswith(EVENT_LOG_SUFFIX) or sid not in candidates:
+            candidates[sid] = path
+
+    if session_id in candidates:
+        return candidates[session_id]
+    if not candidates:
+        raise FileNotFoundError(f"No stored session matches '{session_id}' under {base_dir}")
+    if len(candidates) > 1:
+        raise ValueError(f"Session ID prefix '{session_id}' is ambiguous: {', '.join(sorted(candidates)[:5])}")
+    return next(iter(candidates.values()))
+
+
+def load_session(session_id: str, base_dir: str = "memory/session_logs") -> AgentSession:
+    """Rehydrate an AgentSession from the SQLite store, its event log, its snapshot or a day archive."""
+    flush_session_writes()
+    store = get_session_store()
+    if store is not None:
+        full_id = store.find_session_id(session_id)
+        if full_id:
+            return AgentSession.from_json(store.load(full_id))
+    try:
+        path = find_session_file(session_id, base_dir)
+    except FileNotFoundError:
+        archived = find_archived_session(session_id, base_dir)
+        if archived is None:
+            raise
+        return AgentSession.from_json(read_archived_session(*archived))
+    if path.name.endswith(EVENT_LOG_SUFFIX):
+        return AgentSession.from_json(replay_events(read_event_log(path)))
+    with open(path, "r", encoding="utf-8") as f:
+        return AgentSession.from_json(json.load(f))
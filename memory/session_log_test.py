@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+
+from agent.agent_session import AgentSession, PerceptionSnapshot, Step, ToolCode
+from memory.session_log import (SessionWriter, _advance, _LogCursor, _WriteJob, append_records, frame_record,
+                                read_event_log, replay_events, session_deltas)
+
+
+def perception(achieved: bool) -> PerceptionSnapshot:
+    return PerceptionSnapshot(entities=["x"], result_requirement="a number", original_goal_achieved=achieved,
+                              reasoning="", local_goal_achieved=achieved, local_reasoning="",
+                              last_tooluse_summary="", solution_summary="42" if achieved else "", confidence="0.9")
+
+
+def log_deltas(session: AgentSession, cursor: _LogCursor) -> list[dict]:
+    records = session_deltas(session, cursor)
+    _advance(cursor, records)
+    return records
+
+
+# ── Framing ─────────────────────────────────────────────────
+def test_framed_records_round_trip(tmp_path):
+    path = tmp_path / "s.events.jsonl"
+    records = [{"type": "state", "data": {"answer": "naïve ✓", "n": i}} for i in range(3)]
+    append_records(path, records[:2])
+    append_records(path, records[2:])
+    assert read_event_log(path) == records
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = tmp_path / "s.events.jsonl"
+    append_records(path, [{"type": "state", "data": {"n": 1}}])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(frame_record({"type": "state", "data": {"n": 2}})[:-10])  # crash mid-write
+    assert read_event_log(path) == [{"type": "state", "data": {"n": 1}}]
+
+
+def test_corrupt_record_stops_the_replay(tmp_path):
+    path = tmp_path / "s.events.jsonl"
+    append_records(path, [{"type": "state", "data": {"n": n}} for n in range(3)])
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    lines[1] = lines[1].replace('"n":1', '"n":7')  # payload no longer matches its CRC
+    path.write_text("".join(lines), encoding="utf-8")
+    assert read_event_log(path) == [{"type": "state", "data": {"n": 0}}]
+
+
+# ── Deltas and replay ───────────────────────────────────────
+def test_only_changes_are_logged(tmp_path):
+    session = AgentSession(session_id="s1", original_query="What is 40 + 2?")
+    cursor = _LogCursor(store_path=tmp_path / "s1.json")
+
+    assert [r["type"] for r in log_deltas(session, cursor)] == ["session", "state", "timings"]
+    assert log_deltas(session, cursor) == []
+
+    step = Step(index=0, description="Add", type="CODE",
+                code=ToolCode(tool_name="raw_code_block", tool_arguments={"code": "return add(40, 2)"}))
+    session.add_plan_version(["Step 0: Add"], [step])
+    assert [r["type"] for r in log_deltas(session, cursor)] == ["plan_version", "step"]
+
+    step.status = "completed"
+    records = log_deltas(session, cursor)
+    assert [(r["type"], r["version"], r["position"]) for r in records] == [("step", 0, 0)]
+
+
+def test_replayed_log_matches_the_session(tmp_path):
+    session = AgentSession(session_id="s1", original_query="What is 40 + 2?")
+    cursor = _LogCursor(store_path=tmp_path / "s1.json")
+    path = tmp_path / "s1.events.jsonl"
+
+    append_records(path, log_deltas(session, cursor))
+    session.perception = perception(False)
+    step = Step(index=0, description="Add", type="CODE",
+                code=ToolCode(tool_name="raw_code_block", tool_arguments={"code": "return add(40, 2)"}))
+    session.add_plan_version(["Step 0: Add"], [step])
+    append_records(path, log_deltas(session, cursor))
+    step.status, step.perception = "completed", perception(True)
+    step.execution_result = {"status": "success", "result": "42"}
+    session.mark_complete(step.perception)
+    append_records(path, log_deltas(session, cursor))
+
+    replayed = AgentSession.from_json(replay_events(read_event_log(path)))
+    as_json = lambda s: json.loads(json.dumps(s.to_json(), default=str))
+    assert as_json(replayed) == as_json(session)
+
+
+# ── Background writer ───────────────────────────────────────
+def test_close_drains_queued_writes(tmp_path):
+    writer = SessionWriter(flush_interval=60)
+    paths = [tmp_path / f"s{i}.json" for i in range(20)]
+    for path in paths:
+        writer.submit(_WriteJob(path, path.stem, snapshot={"session_id": path.stem}))
+    writer.close()
+    assert all(path.exists() for path in paths)
+
+
+def test_write_racing_close_is_not_lost(tmp_path):
+    writer = SessionWriter(flush_interval=60)
+    enqueue = writer._queue.put_nowait
+
+    def slow_enqueue(job):
+        time.sleep(0.05)  # close() runs while this submit is between its checks and the enqueue
+        enqueue(job)
+
+    writer._queue.put_nowait = slow_enqueue
+    path = tmp_path / "s1.json"
+    producer = threading.Thread(target=writer.submit, args=(_WriteJob(path, "s1", snapshot={"session_id": "s1"}),))
+    producer.start()
+    time.sleep(0.01)
+    writer.close()
+    producer.join()
+    assert path.exists()
+
+
+def test_flush_after_close_returns(tmp_path):
+    writer = SessionWriter()
+    writer.close()
+    assert writer.flush(timeout=1)
@@ -0,0 +1,345 @@
+"""
+Optional SQLite session store (WAL mode) instead of loose `session_logs/YYYY/MM/DD/<uuid>.json` files.
+
+    AGENT_SESSION_STORE=sqlite                   # memory/sessions.db
+    AGENT_SESSION_STORE=sqlite:/data/agent.db
+
+With it enabled the background session writer applies each batch of live updates in one
+transaction, MemorySearch reads solved sessions through indexes (plus FTS5 over query and
+summary text) and `--resume` looks sessions up by ID prefix without walking the filesystem.
+
+    python -m memory.session_store import memory/session_logs    # load existing JSON sessions
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+SESSION_STORE_ENV = "AGENT_SESSION_STORE"
+SESSION_DB_PATH = "memory/sessions.db"
+SESSION_PERCEPTION = (-1, -1)  # (version, position) of the session-level perception row
+SYNCHRONOUS = {"never": "OFF", "session_end": "NORMAL", "always": "FULL"}  # writer fsync policy → PRAGMA
+FTS_PREFILTER_MIN = 5000  # sessions; smaller stores are scored in full
+FTS_CANDIDATES = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    original_query TEXT NOT NULL,
+    original_goal_achieved INTEGER NOT NULL DEFAULT 0,
+    final_answer TEXT,
+    solution_summary TEXT NOT NULL DEFAULT '',
+    confidence TEXT,
+    state TEXT NOT NULL DEFAULT '{}',
+    timings TEXT NOT NULL DEFAULT '{}',
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_day ON sessions (day);
+CREATE INDEX IF NOT EXISTS sessions_achieved ON sessions (original_goal_achieved, created_at);
+
+CREATE TABLE IF NOT EXISTS plan_versions (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    plan_text TEXT NOT NULL,
+    PRIMARY KEY (session_id, version)
+);
+
+CREATE TABLE IF NOT EXISTS steps (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    step_index INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    description TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, version, position)
+);
+
+CREATE TABLE IF NOT EXISTS perceptions (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    original_goal_achieved INTEGER NOT NULL,
+    local_goal_achieved INTEGER NOT NULL,
+    result_requirement TEXT NOT NULL,
+    solution_summary TEXT NOT NULL,
+    confidence TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, version, position)
+);
+CREATE INDEX IF NOT EXISTS perceptions_achieved ON perceptions (original_goal_achieved, session_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS session_text USING fts5 (session_id UNINDEXED, original_query, solution_summary);
+"""
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def fts_query(text: str) -> str:
+    """Any-token prefix match: 'ascii of INDIA' → '"ascii"* OR "of"* OR "india"*'."""
+    return " OR ".join(f'"{token}"*' for token in re.findall(r"\w+", text.lower()))
+
+
+class SQLiteSessionStore:
+    """
+    Sessions, plan versions, steps and perceptions in one SQLite file.
+
+    Writes come from the session writer thread; reads may come from any thread, each on its
+    own connection (WAL lets readers run alongside the writer).
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            self._local.synchronous = "NORMAL"
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ── Writes ──────────────────────────────────────────────
+    def write_batch(self, updates: list[tuple[str, list[dict], Optional[dict]]], fsync: str = "session_end"):
+        """Apply (session_id, event records, final snapshot) updates in a single transaction."""
+        conn = self._connection()
+        if self._local.synchronous != SYNCHRONOUS[fsync]:
+            conn.execute(f"PRAGMA synchronous={SYNCHRONOUS[fsync]}")
+            self._local.synchronous = SYNCHRONOUS[fsync]
+        with conn:
+            for session_id, records, snapshot in updates:
+                if snapshot is not None:
+                    self._write_snapshot(conn, snapshot)
+                text_changed = snapshot is not None
+                for record in records:
+                    text_changed = self._apply(conn, session_id, record) or text_changed
+                if text_changed:
+                    self._index_text(conn, session_id)
+
+    def _apply(self, conn: sqlite3.Connection, session_id: str, record: dict) -> bool:
+        """Apply one event record; True if it may have changed the session's searchable text."""
+        kind, data = record["type"], record["data"]
+        if kind == "session":
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, created_at, day, original_query) VALUES (?, ?, ?, ?)",
+                (session_id, data["created_at"], datetime.fromtimestamp(data["created_at"]).strftime("%Y-%m-%d"),
+                 data["original_query"]))
+            return inserted.rowcount > 0
+        elif kind == "perception":
+            self._put_perception(conn, session_id, *SESSION_PERCEPTION, data)
+        elif kind == "plan_version":
+            conn.execute("INSERT OR REPLACE INTO plan_versions VALUES (?, ?, ?)",
+                         (session_id, record["version"], _dumps(data)))
+        elif kind == "step":
+            conn.execute("INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (session_id, record["version"], record["position"], data["index"], data["type"],
+                          data["status"], data["description"], _dumps(data)))
+            self._put_perception(conn, session_id, record["version"], record["position"], data.get("perception"))
+        elif kind == "state":
+            conn.execute(
+                "UPDATE sessions SET state = ?, original_goal_achieved = ?, final_answer = ?, solution_summary = ?, "
+                "confidence = ? WHERE session_id = ?",
+                (_dumps(data), bool(data.get("original_goal_achieved")), _str_or_none(data.get("final_answer")),
+                 data.get("solution_summary") or "", _str_or_none(data.get("confidence")), session_id))
+        elif kind == "timings":
+            conn.execute("UPDATE sessions SET timings = ? WHERE session_id = ?", (_dumps(data), session_id))
+        return kind == "state"
+
+    @staticmethod
+    def _put_perception(conn: sqlite3.Connection, session_id: str, version: int, position: int, data: Optional[dict]):
+        if data is None:
+            conn.execute("DELETE FROM perceptions WHERE session_id = ? AND version = ? AND position = ?",
+                         (session_id, version, position))
+            return
+        conn.execute("INSERT OR REPLACE INTO perceptions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (session_id, version, position, bool(data.get("original_goal_achieved")),
+                      bool(data.get("local_goal_achieved")), data.get("result_requirement") or "",
+                      data.get("solution_summary") or "", _str_or_none(data.get("confidence")), _dumps(data)))
+
+    def _write_snapshot(self, conn: sqlite3.Connection, snapshot: dict):
+        """Replace everything stored for the session with a full `AgentSession.to_json` snapshot."""
+        session_id = snapshot["session_id"]
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))  # cascades
+        created_at = snapshot.get("created_at") or time.time()
+        records = [{"type": "session", "data": {"original_query": snapshot["original_query"], "created_at": created_at}},
+                   {"type": "perception", "data": snapshot.get("perception")}]
+        for v, version in enumerate(snapshot.get("plan_versions", [])):
+            records.append({"type": "plan_version", "version": v, "data": version["plan_text"]})
+            records.extend({"type": "step", "version": v, "position": p, "data": step}
+                           for p, step in enumerate(version["steps"]))
+        records.append({"type": "state", "data": snapshot.get("state") or snapshot.get("state_snapshot", {})})
+        records.append({"type": "timings", "data": snapshot.get("timings", {})})
+        for record in records:
+            self._apply(conn, session_id, record)
+        conn.execute("UPDATE sessions SET completed_at = ? WHERE session_id = ?", (time.time(), session_id))
+
+    @staticmethod
+    def _index_text(conn: sqlite3.Connection, session_id: str):
+        conn.execute("DELETE FROM session_text WHERE session_id = ?", (session_id,))
+        conn.execute("INSERT INTO session_text SELECT session_id, original_query, solution_summary "
+                     "FROM sessions WHERE session_id = ?", (session_id,))
+
+    # ── Reads ───────────────────────────────────────────────
+    def find_session_id(self, prefix: str) -> Optional[str]:
+        """Full session ID for an ID or unique prefix; None when nothing matches."""
+        rows = self._connection().execute(
+            "SELECT session_id FROM sessions WHERE session_id >= ? AND session_id < ? ORDER BY session_id LIMIT 6",
+            (prefix, prefix + "\uffff")).fetchall()
+        ids = [row["session_id"] for row in rows]
+        if prefix in ids or len(ids) <= 1:
+            return prefix if prefix in ids else (ids[0] if ids else None)
+        raise ValueError(f"Session ID prefix '{prefix}' is ambiguous: {', '.join(ids[:5])}")
+
+    def load(self, session_id: str) -> Optional[dict]:
+        """The session in the `AgentSession.to_json` shape, or None."""
+        conn = self._connection()
+        row = conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        perception = conn.execute("SELECT data FROM perceptions WHERE session_id = ? AND version = ? AND position = ?",
+                                  (session_id, *SESSION_PERCEPTION)).fetchone()
+        versions = [{"plan_text": json.loads(v["plan_text"]), "steps": []} for v in conn.execute(
+            "SELECT plan_text FROM plan_versions WHERE session_id = ? ORDER BY version", (session_id,))]
+        for step in conn.execute("SELECT version, data FROM steps WHERE session_id = ? ORDER BY version, position",
+                                 (session_id,)):
+            versions[step["version"]]["steps"].append(json.loads(step["data"]))
+        return {
+            "session_id": session_id,
+            "original_query": row["original_query"],
+            "created_at": row["created_at"],
+            "perception": json.loads(perception["data"]) if perception else None,
+            "plan_versions": versions,
+            "state": json.loads(row["state"]),
+            "timings": json.loads(row["timings"]),
+        }
+
+    def memory_entries(self, text: Optional[str] = None, limit: Optional[int] = None,
+                       since_day: Optional[str] = None, max_days: Optional[int] = None) -> list[dict]:
+        """
+        Solved sessions as MemorySearch entries: the first perception (session-level, then steps
+        in order) that marked the original goal achieved, else the session's final state. Answer
+        cache hits are skipped: their answer is already indexed under the session that produced it.
+        `text` narrows candidates with FTS5; `since_day` (YYYY-MM-DD) and `max_days` keep only
+        recent days with solved sessions.
+        """
+        conn = self._connection()
+        filters, params = "", []
+        if text and fts_query(text):
+            filters += " AND session_id IN (SELECT session_id FROM session_text WHERE session_text MATCH ? " \
+                       "ORDER BY rank LIMIT ?)"
+            params += [fts_query(text), limit or -1]
+        if since_day:
+            filters += " AND day >= ?"
+            params.append(since_day)
+        if max_days is not None:
+            filters += " AND day IN (SELECT DISTINCT day FROM sessions WHERE original_goal_achieved = 1 " \
+                       "ORDER BY day DESC LIMIT ?)"
+            params.append(max_days)
+        rows = conn.execute(
+            "SELECT session_id, original_query, result_requirement, solution_summary FROM ("
+            "  SELECT p.session_id, s.created_at, p.version, p.position, s.original_query, p.result_requirement, "
+            "         p.solution_summary "
+            "  FROM perceptions p JOIN sessions s USING (session_id) "
+            f" WHERE p.original_goal_achieved = 1{filters} "
+            "  UNION ALL "
+            "  SELECT session_id, created_at, 1 << 30, 0, original_query, '', solution_summary FROM sessions "
+            f" WHERE original_goal_achieved = 1 AND json_extract(state, '$.cached') IS NOT 1{filters}"
+            ") ORDER BY created_at DESC, session_id, version, position", params * 2)
+
+        entries, seen = [], set()
+        for row in rows:
+            if row["session_id"] in seen:
+                continue
+            seen.add(row["session_id"])
+            entries.append({
+                "file": row["session_id"],
+                "query": row["original_query"],
+                "result_requirement": row["result_requirement"],
+                "solution_summary": row["solution_summary"]
+            })
+        return entries
+
+    def count(self, achieved_only: bool = False) -> int:
+        where = " WHERE original_goal_achieved = 1" if achieved_only else ""
+        return self._connection().execute(f"SELECT COUNT(*) FROM sessions{where}").fetchone()[0]
+
+    # ── Migration ───────────────────────────────────────────
+    def import_json_logs(self, logs_dir: str) -> int:
+        """Load `<session_id>.json` snapshots from a session_logs tree (one transaction)."""
+        snapshots = []
+        for path in Path(logs_dir).rglob("*.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping '{path}': {e}")
+                continue
+            if isinstance(data, dict) and "session_id" in data and "original_query" in data:
+                data.setdefault("created_at", path.stat().st_mtime)
+                snapshots.append((data["session_id"], [], data))
+        self.write_batch(snapshots)
+        return len(snapshots)
+
+
+def _str_or_none(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+_store: Optional[SQLiteSessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SQLiteSessionStore]:
+    """The SQLite store selected by $AGENT_SESSION_STORE ("sqlite" or "sqlite:<path>"), or None for JSON files."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            setting = os.getenv(SESSION_STORE_ENV, "")
+            if setting == "sqlite" or setting.startswith("sqlite:"):
+                path = setting.partition(":")[2] or SESSION_DB_PATH
+                _store = SQLiteSessionStore(path)
+        return _store
+
+
+def configure_session_store(path: Optional[str] = SESSION_DB_PATH) -> Optional[SQLiteSessionStore]:
+    """Switch the process to a SQLite store at `path` (None: back to JSON files)."""
+    global _store
+    with _store_lock:
+        _store = SQLiteSessionStore(path) if path else None
+        return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite session store utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="load JSON session snapshots into the store")
+    importer.add_argument("logs_dir", nargs="?", default="memory/session_logs")
+    importer.add_argument("--db", default=SESSION_DB_PATH)
+    args = parser.parse_args()
+
+    store = SQLiteSessionStore(args.db)
+    imported = store.import_json_logs(args.logs_dir)
+    print(f"✅ Imported {imported} session(s) into {args.db} ({store.count()} total)")
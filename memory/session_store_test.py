@@ -0,0 +1,52 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from memory.session_log import SessionWriter, _WriteJob, session_record
+from memory.session_store import SQLiteSessionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    yield store
+    store.close()
+
+
+def snapshot(session_id: str, query: str, **state) -> dict:
+    return {"session_id": session_id, "original_query": query, "created_at": time.time(), "perception": None,
+            "plan_versions": [], "state": {"original_goal_achieved": True, "solution_summary": "42", **state}}
+
+
+def test_session_row_is_recreated_after_a_failed_first_flush(store):
+    write_batch, calls = store.write_batch, []
+
+    def first_flush_fails(updates, fsync="session_end"):
+        calls.append(updates)
+        if len(calls) == 1:
+            raise OSError("disk hiccup")
+        return write_batch(updates, fsync)
+
+    store.write_batch = first_flush_fails
+    writer = SessionWriter(flush_interval=60, store=store)
+    session = SimpleNamespace(session_id="s1", original_query="What is 40 + 2?", created_at=time.time())
+    header = session_record(session)
+
+    writer.submit(_WriteJob(None, "s1", records=[header], header=header))
+    writer.flush(timeout=5)
+    writer.submit(_WriteJob(None, "s1", records=[
+        {"type": "plan_version", "version": 0, "data": ["Step 0: add"]},
+        {"type": "state", "data": {"original_goal_achieved": False}},
+    ], header=header))
+    writer.flush(timeout=5)
+    writer.close()
+
+    assert store.count() == 1
+    assert store.load("s1")["plan_versions"][0]["plan_text"] == ["Step 0: add"]
+
+
+def test_answer_cache_hits_are_not_memory_entries(store):
+    store.write_batch([("s1", [], snapshot("s1", "What is 40 + 2?")),
+                       ("s2", [], snapshot("s2", "What is 40 + 2?", cached=True))])
+    assert [entry["file"] for entry in store.memory_entries()] == ["s1"]
@@ -1,27 +1,29 @@
 import datetime
 import json
-import os
 import uuid
 from pathlib import Path
 
-from dotenv import load_dotenv
-from google import genai
-from google.genai.errors import ServerError
-
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=api_key)
+from agent.metrics import LLM_PROMPT_TOKENS, LLM_REQUESTS, LLM_SECONDS
+from agent.tracing import span
+from llm.client import get_client
+from llm.prompt_budget import PERCEPTION_TOKEN_BUDGET, PromptBudget, estimate_tokens
+from llm.resilience import LLMUnavailableError, ResilientLLM
+from llm.streaming import read_json_stream
 
 
 class Perception:
 
-    def __init__(self, perception_prompt_path: str, api_key: str | None = None, model: str = "gemini-2.0-flash"):
-        load_dotenv()
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment or explicitly provided.")
-        self.client = genai.Client(api_key=self.api_key)
+    def __init__(self, perception_prompt_path: str, api_key: str | None = None, model: str = "gemini-2.0-flash",
+                 token_budget: int = PERCEPTION_TOKEN_BUDGET, hedge: bool = False):
+        self.api_key = api_key
+        self.model = model
         self.perception_prompt_path = perception_prompt_path
+        self.budget = PromptBudget(token_budget, label="Perception prompt")
+        self.llm = ResilientLLM("Perception", hedge=hedge)
+
+    @property
+    def client(self):
+        return get_client(self.api_key)
 
     def build_perception_input(self, raw_input: str, memory: list, current_plan="",
                                snapshot_type: str = "user_query") -> dict:
@@ -52,31 +54,37 @@ class Perception:
     def run(self, perception_input: dict) -> dict:
         """Run perception on given input using the specified prompt file."""
         prompt_template = Path(self.perception_prompt_path).read_text(encoding="utf-8")
+        perception_input = self.budget.fit(perception_input, reserved_tokens=estimate_tokens(prompt_template))
         full_prompt = f"{prompt_template.strip()}\n\n```json\n{json.dumps(perception_input, indent=2)}\n```"
 
-        try:
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=full_prompt
-            )
-        except ServerError as e:
-            print(f"🚫 Perception LLM ServerError: {e}")
-            return {
-                "step_index": 0,
-                "description": "Perception model unavailable: server overload.",
-                "type": "NOP",
-                "code": "",
-                "conclusion": "",
-                "plan_text": ["Step 0: Perception model returned a 503. Exiting to avoid loop."],
-                "raw_text": str(e)
-            }
-
-        raw_text = response.text.strip()
+        prompt_tokens = estimate_tokens(full_prompt)
+        LLM_PROMPT_TOKENS.observe(prompt_tokens, module="perception")
+        with span("llm:perception", model=self.model, prompt_chars=len(full_prompt),
+                  prompt_tokens=prompt_tokens) as llm_span, LLM_SECONDS.time(module="perception"):
+            try:
+                # Stream and stop reading as soon as the ```json block closes
+                parser = self.llm.call(lambda: read_json_stream(self.client.models.generate_content_stream(
+                    model=self.model,
+                    contents=full_prompt
+                )))
+            except LLMUnavailableError as e:
+                print(f"🚫 Perception LLM unavailable: {e}")
+                llm_span.set(outcome="unavailable")
+                LLM_REQUESTS.inc(module="perception", outcome="unavailable")
+                return {
+                    "step_index": 0,
+                    "description": "Perception model unavailable: server overload.",
+                    "type": "NOP",
+                    "code": "",
+                    "conclusion": "",
+                    "plan_text": ["Step 0: Perception model returned a 503. Exiting to avoid loop."],
+                    "raw_text": str(e)
+                }
+            llm_span.set(response_chars=len(parser.text))
+            LLM_REQUESTS.inc(module="perception", outcome="ok")
 
         try:
-            json_block = raw_text.split("```json")[1].split("```")[0].strip()
-            # Minimal sanitization — no unicode decoding
-            output = json.loads(json_block)
+            output = parser.parse()
 
             # ✅ Patch missing fields for PerceptionSnapshot
             required_fields = {
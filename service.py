@@ -0,0 +1,199 @@
+"""
+Long-running agent service: a small HTTP/JSON API over TCP or a Unix socket.
+
+    python service.py --port 8765 --max-concurrency 8
+    python service.py --unix-socket /tmp/agent.sock
+
+Endpoints:
+    POST /query   {"query": "..."}  → streams NDJSON progress events, ending with a "result" event
+    GET  /health                    → {"status": "ok", "in_flight": n, "queued": n, "max_concurrency": n}
+    GET  /metrics                   → Prometheus text format
+
+Every query runs as an independent AgentSession on one shared MultiMCP tool pool.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.events import emit, event_sink
+from agent.metrics import CONTENT_TYPE, REGISTRY, start_metrics
+from agent.profiling import DEFAULT_PROFILE_DIR, SessionProfiler
+from agent.runtime import build_agent_loop, start_multi_mcp
+from agent.tracing import TRACE_PATH_ENV, enable_tracing
+
+MAX_CONCURRENCY = 8
+MAX_REQUEST_BYTES = 1_000_000
+THREADS_PER_SESSION = 3  # perception + speculative decision + memory search
+
+
+class AgentService:
+    def __init__(self, agent_loop, max_concurrency: int = MAX_CONCURRENCY):
+        self.agent_loop = agent_loop
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+
+    # ── HTTP plumbing ───────────────────────────────────────
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, path, _ = request_line.split(" ", 2)
+
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_REQUEST_BYTES:
+                await self.respond_json(writer, 413, {"error": "Request body too large"})
+                return
+            body = await reader.readexactly(length) if length else b""
+
+            if method == "GET" and path == "/health":
+                await self.respond_json(writer, 200, {
+                    "status": "ok",
+                    "in_flight": self.in_flight,
+                    "queued": self.queued,
+                    "max_concurrency": self.max_concurrency
+                })
+            elif method == "GET" and path == "/metrics":
+                await self.respond(writer, 200, REGISTRY.render().encode("utf-8"), CONTENT_TYPE)
+            elif method == "POST" and path == "/query":
+                await self.handle_query(body, writer)
+            else:
+                await self.respond_json(writer, 404, {"error": f"No route for {method} {path}"})
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self.respond_json(writer, 400, {"error": f"Malformed request: {e}"})
+        except ConnectionError:
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def respond_json(self, writer, status: int, payload: dict):
+        await self.respond(writer, status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    async def respond(self, writer, status: int, body: bytes, content_type: str):
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            .encode("latin-1") + body
+        )
+        await writer.drain()
+
+    # ── Query handling ──────────────────────────────────────
+    async def handle_query(self, body: bytes, writer: asyncio.StreamWriter):
+        try:
+            query = json.loads(body or b"{}").get("query", "").strip()
+        except (json.JSONDecodeError, AttributeError):
+            query = ""
+        if not query:
+            await self.respond_json(writer, 400, {"error": "Body must be JSON with a non-empty 'query'"})
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+        events: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        task = asyncio.create_task(self.run_session(query, lambda event: loop.call_soon_threadsafe(events.put_nowait, event)))
+        task.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
+
+        try:
+            while (event := await events.get()) is not None:
+                writer.write(json.dumps(event, default=str).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            print("⚠️ Client disconnected; session keeps running to completion.")
+
+    async def run_session(self, query: str, sink):
+        with event_sink(sink):
+            self.queued += 1
+            emit("queued", in_flight=self.in_flight, max_concurrency=self.max_concurrency)
+            async with self.semaphore:
+                self.queued -= 1
+                self.in_flight += 1
+                try:
+                    session = await self.agent_loop.run(query)
+                    emit("result", session_id=session.session_id, **session.state)
+                except Exception as e:
+                    print(f"❌ Session failed for query '{query[:60]}': {e}")
+                    emit("error", error=f"{type(e).__name__}: {e}")
+                finally:
+                    self.in_flight -= 1
+
+
+async def serve(args):
+    # Each session keeps a few blocking LLM/memory calls in worker threads
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=args.max_concurrency * THREADS_PER_SESSION, thread_name_prefix="agent")
+    )
+
+    if args.trace:
+        enable_tracing(args.trace)
+    stop_metrics_dump = start_metrics(args.metrics_port, args.metrics_file)
+    print("Loading MCP Server...")
+    multi_mcp = await start_multi_mcp(args.config)
+    agent_loop = build_agent_loop(multi_mcp, strategy=args.strategy, speculative=args.speculative,
+                                  multi_step=args.multi_step)
+    profiler = SessionProfiler(args.profile) if args.profile else None
+    if profiler:
+        agent_loop = profiler.wrap(agent_loop)
+    service = AgentService(agent_loop, max_concurrency=args.max_concurrency)
+
+    if args.unix_socket:
+        server = await asyncio.start_unix_server(service.handle_connection, path=args.unix_socket)
+        print(f"🚀 Agent service listening on unix://{args.unix_socket}")
+    else:
+        server = await asyncio.start_server(service.handle_connection, host=args.host, port=args.port)
+        print(f"🚀 Agent service listening on http://{args.host}:{args.port}")
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+
+    async with server:
+        await stop.wait()
+        print(f"👋 Shutting down ({service.in_flight} session(s) in flight).")
+
+    if profiler:
+        profiler.close()
+    if stop_metrics_dump:
+        stop_metrics_dump()
+    await multi_mcp.shutdown()
+    if args.unix_socket and os.path.exists(args.unix_socket):
+        os.unlink(args.unix_socket)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--strategy", default="exploratory", choices=["exploratory", "conservative"])
+    parser.add_argument("--speculative", action="store_true", help="overlap next-step decisions with perception")
+    parser.add_argument("--multi-step", action="store_true", help="run multi-step CODE plans without LLM calls between steps")
+    parser.add_argument("--trace", default=os.getenv(TRACE_PATH_ENV), metavar="PATH",
+                        help=f"append tracing spans as JSONL (default: ${TRACE_PATH_ENV})")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help=f"profile each query into DIR (default: {DEFAULT_PROFILE_DIR}); queries then run one at a time")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port")
+    parser.add_argument("--metrics-file", help="periodically dump Prometheus metrics to this file")
+    parser.add_argument("--config", default="config/mcp_server_config.yaml")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(parse_args()))